@@ -0,0 +1,63 @@
+class BitsetNFA:
+    # NFA with states numbered 0..n-1, a set of states is an int with bit i set for state i
+    def __init__(self, fa):
+        names = list(fa.states)
+        for (state, _), targets in fa.full_transitions.items():
+            names.extend([state, *targets])
+        names.append(fa.start_state)
+        self.index = {}
+        for name in names:
+            self.index.setdefault(name, len(self.index))
+        self.names = list(self.index)
+
+        self.symbols = list(fa.alphabet)
+        self.successors = {symbol: [0] * len(self.names) for symbol in self.symbols}
+        for (state, symbol), targets in fa.full_transitions.items():
+            if symbol in self.successors:
+                for target in targets:
+                    self.successors[symbol][self.index[state]] |= 1 << self.index[target]
+
+        self.final_mask = 0
+        for state in fa.final_states:
+            if state in self.index:
+                self.final_mask |= 1 << self.index[state]
+        self.start_mask = 1 << self.index[fa.start_state]
+
+        # Moves are memoized per 8-bit chunk of the mask, so dense subsets cost n/8 lookups
+        self.chunk_moves = {symbol: {} for symbol in self.symbols}
+
+    def move(self, mask, symbol):
+        moves = self.chunk_moves[symbol]
+        successors = self.successors[symbol]
+        result = 0
+        offset = 0
+        while mask:
+            chunk = mask & 0xFF
+            if chunk:
+                key = (offset, chunk)
+                if key not in moves:
+                    combined = 0
+                    for bit in range(8):
+                        if chunk >> bit & 1:
+                            combined |= successors[offset + bit]
+                    moves[key] = combined
+                result |= moves[key]
+            mask >>= 8
+            offset += 8
+        return result
+
+    def alive_mask(self):
+        # States from which some final state can still be reached
+        alive = self.final_mask
+        changed = True
+        while changed:
+            changed = False
+            for successors in self.successors.values():
+                for state, targets in enumerate(successors):
+                    if targets & alive and not alive >> state & 1:
+                        alive |= 1 << state
+                        changed = True
+        return alive
+
+    def subset(self, mask):
+        return frozenset(self.names[i] for i in range(mask.bit_length()) if mask >> i & 1)
@@ -0,0 +1,97 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+
+from compiled import CompiledDFA
+
+FORMAT_VERSION = 1
+MAGIC = b'LFAD'
+# magic, format version, byte order of the table, states, symbol classes, start state, symbols length
+HEADER = struct.Struct('<4sBBxxIIII')
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'lfa')
+BYTE_ORDER = 0 if sys.byteorder == 'little' else 1
+
+
+def grammar_key(grammar):
+    # Same grammar gives the same key no matter how the sets and rule lists were ordered
+    canonical = {
+        'version': FORMAT_VERSION,
+        'VN': sorted(grammar.VN),
+        'VT': sorted(grammar.VT),
+        'P': {lhs: sorted(rules) for lhs, rules in sorted(grammar.P.items())},
+        'start': grammar.start_symbol,
+    }
+    encoded = json.dumps(canonical, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def save_compiled(dfa, path):
+    symbols = json.dumps(dfa.symbols, ensure_ascii=False).encode('utf-8')
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, BYTE_ORDER, dfa.num_states, dfa.num_classes,
+                         dfa.start, len(symbols))
+    body = header + symbols + bytes(dfa.accept) + bytes(dfa.dead)
+    padding = b'\0' * (-len(body) % 4)  # keep the int32 table aligned inside the map
+
+    # Written next to the target and renamed, so readers never see a half written file
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'wb') as file:
+        file.write(body + padding)
+        file.write(bytes(dfa.table))
+    os.replace(temporary, path)
+
+
+def load_compiled(path):
+    # Returns None when the file is missing, was written by another format version or is
+    # truncated or damaged, so the caller rebuilds it
+    try:
+        file = open(path, 'rb')
+    except FileNotFoundError:
+        return None
+    with file:
+        size = os.fstat(file.fileno()).st_size
+        if size < HEADER.size:
+            return None
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version, byte_order, num_states, num_classes, start, symbols_length = HEADER.unpack_from(mapped)
+    if magic != MAGIC or version != FORMAT_VERSION or byte_order != BYTE_ORDER:
+        mapped.close()
+        return None
+
+    table_offset = HEADER.size + symbols_length + 2 * num_states
+    table_offset += -table_offset % 4
+    table_size = num_states * num_classes * 4
+    if size != table_offset + table_size or start >= num_states:
+        mapped.close()
+        return None
+
+    offset = HEADER.size
+    try:
+        symbols = json.loads(bytes(mapped[offset:offset + symbols_length]).decode('utf-8'))
+    except ValueError:  # also covers UnicodeDecodeError
+        mapped.close()
+        return None
+    if not isinstance(symbols, list) or len(symbols) + 1 != num_classes:
+        mapped.close()
+        return None
+    offset += symbols_length
+    accept = bytearray(mapped[offset:offset + num_states])
+    offset += num_states
+    dead = bytearray(mapped[offset:offset + num_states])
+
+    # The table stays in the shared map, only the small bitmaps are copied
+    table = memoryview(mapped)[table_offset:table_offset + table_size].cast('i')
+    return CompiledDFA(symbols, table, accept, start, dead=dead)
+
+
+def load_or_compile(grammar, cache_dir=DEFAULT_CACHE_DIR):
+    path = os.path.join(cache_dir, grammar_key(grammar) + '.dfa')
+    dfa = load_compiled(path)
+    if dfa is None:
+        os.makedirs(cache_dir, exist_ok=True)
+        save_compiled(grammar.to_finite_automata().compile().minimize(), path)
+        dfa = load_compiled(path)
+    return dfa
@@ -0,0 +1,270 @@
+from array import array
+from collections import deque
+
+import numpy as np
+
+
+class CompiledDFA:
+    def __init__(self, symbols, table, accept, start, state_names=None, dead=None):
+        self.symbols = list(symbols)  # index in this list is the symbol class
+        self.symbol_index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.num_classes = len(self.symbols) + 1  # last class catches symbols outside the alphabet
+        self.table = table  # flat array('i'): table[state * num_classes + symbol_class]
+        self.accept = accept  # bytearray, 1 for accepting states
+        self.start = start
+        self.num_states = len(accept)
+        self.state_names = state_names if state_names is not None else [None] * self.num_states
+        self.dead = dead if dead is not None else self.find_dead_states()
+        self.byte_classes = self.build_byte_classes()
+
+    @classmethod
+    def from_automaton(cls, fa):
+        if not fa.is_deterministic():
+            fa = fa.convert_to_dfa()
+
+        symbols = sorted(fa.alphabet)
+        k = len(symbols) + 1
+
+        # Number the reachable states in BFS order, the sink state goes last
+        index = {fa.start_state: 0}
+        names = [fa.start_state]
+        rows = []
+        queue = deque([fa.start_state])
+        while queue:
+            state = queue.popleft()
+            row = []
+            for symbol in symbols:
+                targets = fa.full_transitions.get((state, symbol))
+                if not targets:
+                    row.append(-1)
+                    continue
+                target = next(iter(targets))
+                if target not in index:
+                    index[target] = len(names)
+                    names.append(target)
+                    queue.append(target)
+                row.append(index[target])
+            rows.append(row)
+
+        sink = len(names)
+        names.append(None)
+        table = array('i', [sink]) * ((sink + 1) * k)
+        for state, row in enumerate(rows):
+            for symbol_class, target in enumerate(row):
+                if target != -1:
+                    table[state * k + symbol_class] = target
+
+        accept = bytearray(sink + 1)
+        for state, name in enumerate(names[:sink]):
+            if name in fa.final_states:
+                accept[state] = 1
+
+        return cls(symbols, table, accept, 0, names)
+
+    def find_dead_states(self):
+        # A state is dead when no accepting state can be reached from it
+        k = self.num_classes
+        predecessors = [[] for _ in range(self.num_states)]
+        for state in range(self.num_states):
+            for target in self.table[state * k:(state + 1) * k]:
+                predecessors[target].append(state)
+
+        alive = bytearray(self.accept)
+        stack = [state for state in range(self.num_states) if alive[state]]
+        while stack:
+            state = stack.pop()
+            for previous in predecessors[state]:
+                if not alive[previous]:
+                    alive[previous] = 1
+                    stack.append(previous)
+        return bytearray(1 - flag for flag in alive)
+
+    def build_byte_classes(self):
+        # 256-entry table for bytes.translate, only possible for single character symbols
+        if len(self.symbols) >= 256:
+            return None
+        classes = bytearray([self.num_classes - 1]) * 256
+        for symbol_class, symbol in enumerate(self.symbols):
+            if isinstance(symbol, str) and len(symbol) == 1 and ord(symbol) < 256:
+                classes[ord(symbol)] = symbol_class
+            else:
+                return None
+        return bytes(classes)
+
+    def encode(self, input_string):
+        # Turns the input into a sequence of symbol classes, None if it can't be accepted at all
+        if self.byte_classes is not None:
+            if isinstance(input_string, str):
+                try:
+                    input_string = input_string.encode('latin-1')
+                except UnicodeEncodeError:
+                    return None  # contains characters that are not in the alphabet
+            if isinstance(input_string, (bytes, bytearray, memoryview)):
+                return bytes(input_string).translate(self.byte_classes)
+        unknown = self.num_classes - 1
+        return [self.symbol_index.get(symbol, unknown) for symbol in input_string]
+
+    def step(self, state, symbol_class):
+        return self.table[state * self.num_classes + symbol_class]
+
+    def validate(self, input_string):
+        classes = self.encode(input_string)
+        if classes is None:
+            return False
+
+        table, k, dead = self.table, self.num_classes, self.dead
+        state = self.start
+        if dead[state]:
+            return False
+        for symbol_class in classes:
+            state = table[state * k + symbol_class]
+            if dead[state]:
+                return False
+        return bool(self.accept[state])
+
+    def encode_many(self, strings):
+        # Padded matrix of symbol classes, one column per string, plus the string lengths
+        pad = self.num_classes  # extra class that keeps every state where it is
+        rejected = np.zeros(len(strings), dtype=bool)
+        joined = None
+        if self.byte_classes is not None:
+            try:
+                # Encode the whole batch with one join and one translate
+                joined = ''.join(strings).encode('latin-1').translate(self.byte_classes)
+                lengths = np.fromiter(map(len, strings), dtype=np.int64, count=len(strings))
+            except (TypeError, UnicodeEncodeError):
+                joined = None
+
+        if joined is None:
+            rows = []
+            for i, string in enumerate(strings):
+                classes = self.encode(string)
+                if classes is None:
+                    rejected[i] = True
+                    classes = []
+                rows.append(classes)
+            lengths = np.fromiter(map(len, rows), dtype=np.int64, count=len(rows))
+
+        width = int(lengths.max()) if len(strings) else 0
+        dtype = np.uint8 if pad < 256 else np.int32
+        matrix = np.full((len(strings), width), pad, dtype=dtype)
+        if width:
+            mask = np.arange(width) < lengths[:, None]
+            if joined is not None:
+                matrix[mask] = np.frombuffer(joined, dtype=np.uint8)
+            else:
+                matrix[mask] = np.fromiter((c for row in rows for c in row), dtype=dtype, count=int(lengths.sum()))
+        # Transposed so that every step reads one contiguous row
+        return np.ascontiguousarray(matrix.T), lengths, rejected
+
+    def numpy_table(self):
+        # Flat int32 copy of the table with an identity column for the padding class
+        table = np.frombuffer(self.table, dtype=np.int32).reshape(self.num_states, self.num_classes)
+        stay = np.arange(self.num_states, dtype=np.int32)[:, None]
+        return np.hstack([table, stay]).ravel()
+
+    def validate_many(self, strings):
+        strings = list(strings)
+        matrix, lengths, rejected = self.encode_many(strings)
+        table = self.numpy_table()
+        width = np.int32(self.num_classes + 1)
+        dead = np.frombuffer(bytes(self.dead), dtype=np.uint8).astype(bool)
+        accept = np.frombuffer(bytes(self.accept), dtype=np.uint8).astype(bool)
+
+        states = np.full(len(strings), self.start, dtype=np.int32)
+        for column in matrix:
+            states = table.take(states * width + column)
+            if dead.take(states).all():
+                break
+        return accept[states] & ~rejected
+
+    def minimize(self):
+        # Hopcroft partition refinement, O(n * k * log n)
+        n, k = self.num_states, self.num_classes
+        table = self.table
+
+        inverse = [[[] for _ in range(n)] for _ in range(k)]
+        for state in range(n):
+            row = state * k
+            for symbol_class in range(k):
+                inverse[symbol_class][table[row + symbol_class]].append(state)
+
+        blocks = []
+        block_of = [0] * n
+        for accepting in (1, 0):
+            members = {state for state in range(n) if self.accept[state] == accepting}
+            if members:
+                for state in members:
+                    block_of[state] = len(blocks)
+                blocks.append(members)
+
+        # Only the smaller half of every split has to be processed again
+        smallest = min(range(len(blocks)), key=lambda b: len(blocks[b]))
+        worklist = deque((smallest, symbol_class) for symbol_class in range(k))
+        pending = set(worklist)
+
+        while worklist:
+            splitter, symbol_class = worklist.popleft()
+            pending.discard((splitter, symbol_class))
+
+            # States that move into the splitter block on this symbol, grouped by their block
+            touched = {}
+            for target in blocks[splitter]:
+                for state in inverse[symbol_class][target]:
+                    touched.setdefault(block_of[state], []).append(state)
+
+            for block, members in touched.items():
+                if len(members) == len(blocks[block]):
+                    continue
+                new_block = len(blocks)
+                split_off = set(members)
+                blocks[block] -= split_off
+                blocks.append(split_off)
+                for state in split_off:
+                    block_of[state] = new_block
+
+                for other_class in range(k):
+                    if (block, other_class) in pending:
+                        entry = (new_block, other_class)
+                    elif len(split_off) <= len(blocks[block]):
+                        entry = (new_block, other_class)
+                    else:
+                        entry = (block, other_class)
+                    worklist.append(entry)
+                    pending.add(entry)
+
+        return self.from_partition(blocks, block_of)
+
+    def from_partition(self, blocks, block_of):
+        # Renumber the blocks in BFS order from the start, all dead states collapse into the last one
+        k = self.num_classes
+        dead_block = block_of[self.num_states - 1]  # the sink state is always numbered last
+        number = {dead_block: None}
+        order = []
+        queue = deque([block_of[self.start]])
+        if block_of[self.start] != dead_block:
+            number[block_of[self.start]] = 0
+            order.append(block_of[self.start])
+        while queue:
+            block = queue.popleft()
+            representative = next(iter(blocks[block]))
+            for symbol_class in range(k):
+                target = block_of[self.table[representative * k + symbol_class]]
+                if target not in number:
+                    number[target] = len(order)
+                    order.append(target)
+                    queue.append(target)
+        sink = len(order)
+        number[dead_block] = sink
+
+        table = array('i', [sink]) * ((sink + 1) * k)
+        accept = bytearray(sink + 1)
+        for block in order:
+            representative = next(iter(blocks[block]))
+            row = number[block] * k
+            for symbol_class in range(k):
+                table[row + symbol_class] = number[block_of[self.table[representative * k + symbol_class]]]
+            accept[number[block]] = self.accept[representative]
+
+        names = list(range(sink)) + [None]
+        return CompiledDFA(self.symbols, table, accept, number[block_of[self.start]], names)
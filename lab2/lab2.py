@@ -1,4 +1,13 @@
 import random
+from collections import deque
+
+from bitset import BitsetNFA
+from cache import DEFAULT_CACHE_DIR, load_or_compile
+from compiled import CompiledDFA
+from language import Language
+from lazy import LazyDFA
+from operations import complement, find_witness, product, shortest_word
+from stream import Matcher, validate_file
 
 class Grammar:
     def __init__(self, VN, VT, P, start_symbol="S"):
@@ -64,6 +73,21 @@ class Grammar:
             current = new_string
         return current
 
+    def generate_strings(self, max_length=None):
+        # Every word of the language in shortlex order, instead of random derivations
+        return self.to_finite_automata().language().enumerate(max_length)
+
+    def count_strings(self, length):
+        return self.to_finite_automata().language().count(length)
+
+    def sample(self, length, k=1, seed=None):
+        # Uniformly random words of a fixed length, reproducible through seed
+        return self.to_finite_automata().language().sample(length, k, seed)
+
+    def compile(self, cache_dir=DEFAULT_CACHE_DIR):
+        # Minimal compiled DFA, memory-mapped from the on-disk cache when it was built before
+        return load_or_compile(self, cache_dir)
+
     def to_finite_automata(self):
         states = set(self.VN) | {""}
         alphabet = set(self.VT)
@@ -130,8 +154,85 @@ class FiniteAutomata:
 
             if not next_states:
                 return False
+            current_states = next_states
         return bool(current_states & self.final_states)
 
+    def compile(self):
+        # Integer-indexed DFA for fast validation of many strings
+        return CompiledDFA.from_automaton(self)
+
+    def language(self):
+        # Counting and enumeration run on the minimal DFA
+        return Language(self.compile().minimize())
+
+    def matcher(self):
+        # Incremental matcher for input that arrives in chunks
+        return Matcher(self.compile())
+
+    def validate_file(self, path):
+        return validate_file(self.compile(), path)
+
+    def lazy(self, cache_size=1024, on_full="flush"):
+        # DFA states are built only when the input reaches them, memory stays bounded by cache_size
+        return LazyDFA(self, cache_size, on_full)
+
+    def validate_many(self, strings):
+        # Boolean numpy array, one entry per input string
+        return self.compile().validate_many(strings)
+
+    @classmethod
+    def from_compiled(cls, dfa):
+        # States become the integers of the table, dead states are left out
+        states = {dfa.start}
+        transitions = {}
+        for state in range(dfa.num_states):
+            if dfa.dead[state]:
+                continue
+            states.add(state)
+            for symbol_class, symbol in enumerate(dfa.symbols):
+                target = dfa.step(state, symbol_class)
+                if not dfa.dead[target]:
+                    transitions[(state, symbol)] = {target}
+        final_states = {state for state in states if dfa.accept[state]}
+        return cls(states, set(dfa.symbols), transitions, dfa.start, final_states)
+
+    def minimize(self):
+        # Minimal DFA with states renamed to 0..n-1
+        return FiniteAutomata.from_compiled(self.compile().minimize())
+
+    def intersect(self, other):
+        return FiniteAutomata.from_compiled(product(self.compile(), other.compile(), 'intersection').minimize())
+
+    def union(self, other):
+        return FiniteAutomata.from_compiled(product(self.compile(), other.compile(), 'union').minimize())
+
+    def difference(self, other):
+        return FiniteAutomata.from_compiled(product(self.compile(), other.compile(), 'difference').minimize())
+
+    def complement(self):
+        # Relative to the alphabet of this automaton
+        return FiniteAutomata.from_compiled(complement(self.compile()).minimize())
+
+    def shortest_word(self):
+        return shortest_word(self.compile())
+
+    def is_empty(self):
+        return self.shortest_word() is None
+
+    def subset_witness(self, other):
+        # Shortest word accepted here but not by other, None if there is none
+        return find_witness(self.compile(), other.compile(), 'difference')
+
+    def equivalence_witness(self, other):
+        # Shortest word accepted by exactly one of the two automata
+        return find_witness(self.compile(), other.compile(), 'symmetric_difference')
+
+    def is_subset(self, other):
+        return self.subset_witness(other) is None
+
+    def is_equivalent(self, other):
+        return self.equivalence_witness(other) is None
+
     def is_deterministic(self):
         # Check if any state lacks a transition for any alphabet symbol
         for state in self.states:
@@ -150,48 +251,43 @@ class FiniteAutomata:
                         return False
         return True
 
-    def convert_to_dfa(self):
-        dfa_states = set()
-        dfa_transitions = {}
-        dfa_final_states = set()
-        
-        # Start with the start state
-        start_state_set = frozenset([self.start_state])
-        unmarked_states = [start_state_set]
-        dfa_states.add(start_state_set)
-        
-        # Process all unmarked state sets
+    def convert_to_dfa(self, max_states=None, progress=None):
+        # Subset construction over bitsets: bit i of a mask stands for NFA state number i
+        nfa = BitsetNFA(self)
+        start_mask = nfa.start_mask
+        seen = {start_mask}
+        unmarked_states = deque([start_mask])
+        mask_transitions = {}
         while unmarked_states:
-            current_state_set = unmarked_states.pop(0)
-            
-            # Check if this is a final state
-            if any(state in self.final_states for state in current_state_set):
-                dfa_final_states.add(current_state_set)
-            
-            # For each symbol in the alphabet
-            for symbol in self.alphabet:
-                next_state_set = set()
-                for state in current_state_set:
-                    if (state, symbol) in self.full_transitions:
-                        next_state_set.update(self.full_transitions[(state, symbol)])
-                next_state_set = frozenset(next_state_set)
-
-                if not next_state_set:
+            current = unmarked_states.popleft()
+            for symbol in nfa.symbols:
+                target = nfa.move(current, symbol)
+                if not target:
                     continue  # No transition for this symbol
-                
-                # Add the transition
-                dfa_transitions[(current_state_set, symbol)] = {next_state_set}
-                
-                # If this is a new state, add it to be processed
-                if next_state_set not in dfa_states:
-                    dfa_states.add(next_state_set)
-                    unmarked_states.append(next_state_set)
+                mask_transitions[(current, symbol)] = target
+                if target not in seen:
+                    if max_states is not None and len(seen) >= max_states:
+                        raise ValueError(f"Subset construction exceeded {max_states} states")
+                    seen.add(target)
+                    unmarked_states.append(target)
+            if progress is not None:
+                progress(len(seen), len(unmarked_states))
+
+        # Only now turn the masks back into frozensets of NFA states
+        subsets = {mask: nfa.subset(mask) for mask in seen}
+
+        dfa_states = set(subsets.values())
+        dfa_final_states = {subsets[mask] for mask in seen if mask & nfa.final_mask}
+        dfa_transitions = {
+            (subsets[current], symbol): {subsets[target]}
+            for (current, symbol), target in mask_transitions.items()
+        }
 
         return FiniteAutomata(
             dfa_states,
             self.alphabet,
             dfa_transitions,
-            start_state_set,
+            subsets[start_mask],
             dfa_final_states
         )
 
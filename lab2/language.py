@@ -0,0 +1,126 @@
+import random
+
+MATRIX_POWER_THRESHOLD = 4096  # longer lengths are counted by matrix power instead of the cached table
+
+
+class Language:
+    # Counting and enumeration of the words accepted by a CompiledDFA
+    def __init__(self, dfa):
+        self.dfa = dfa
+        self.num_symbols = dfa.num_classes - 1  # the last class never leads anywhere useful
+        # completions[r][state] = number of accepted words of length r starting from state
+        self.completions = [[int(flag) for flag in dfa.accept]]
+
+    def completion_table(self, length):
+        dfa, k = self.dfa, self.dfa.num_classes
+        while len(self.completions) <= length:
+            previous = self.completions[-1]
+            self.completions.append([
+                sum(previous[dfa.table[state * k + symbol_class]] for symbol_class in range(self.num_symbols))
+                for state in range(dfa.num_states)
+            ])
+        return self.completions
+
+    def count(self, length):
+        if length < len(self.completions) or length <= MATRIX_POWER_THRESHOLD:
+            return self.completion_table(length)[length][self.dfa.start]
+        return self.count_by_matrix_power(length)
+
+    def count_by_matrix_power(self, length):
+        # Entry (i, j) of M^n counts the words of length n leading from state i to state j
+        dfa, k, n = self.dfa, self.dfa.num_classes, self.dfa.num_states
+        matrix = [[0] * n for _ in range(n)]
+        for state in range(n):
+            for symbol_class in range(self.num_symbols):
+                matrix[state][dfa.table[state * k + symbol_class]] += 1
+
+        row = [0] * n
+        row[dfa.start] = 1
+        while length:
+            if length & 1:
+                row = [sum(row[i] * matrix[i][j] for i in range(n) if row[i]) for j in range(n)]
+            length >>= 1
+            if length:
+                matrix = [[sum(a * b for a, b in zip(matrix_row, column)) for column in zip(*matrix)]
+                          for matrix_row in matrix]
+        return sum(count for state, count in enumerate(row) if dfa.accept[state])
+
+    def words(self, length):
+        # All accepted words of one length in lexicographic order, memory is O(length)
+        dfa, k = self.dfa, self.dfa.num_classes
+        completions = self.completion_table(length)
+        if not completions[length][dfa.start]:
+            return
+
+        path = []
+        states = [dfa.start]
+        next_class = [0]
+        while states:
+            depth = len(path)
+            if depth == length:
+                yield ''.join(path)
+                states.pop()
+                next_class.pop()
+                if path:
+                    path.pop()
+                continue
+
+            state = states[-1]
+            remaining = completions[length - depth - 1]
+            symbol_class = next_class[-1]
+            while symbol_class < self.num_symbols and not remaining[dfa.table[state * k + symbol_class]]:
+                symbol_class += 1
+            if symbol_class == self.num_symbols:
+                states.pop()
+                next_class.pop()
+                if path:
+                    path.pop()
+                continue
+
+            next_class[-1] = symbol_class + 1
+            states.append(dfa.table[state * k + symbol_class])
+            next_class.append(0)
+            path.append(dfa.symbols[symbol_class])
+
+    def enumerate(self, max_length=None):
+        # Shortlex order: by length, then lexicographically
+        dfa, k = self.dfa, self.dfa.num_classes
+        frontier = {dfa.start} if not dfa.dead[dfa.start] else set()
+        length = 0
+        while frontier and (max_length is None or length <= max_length):
+            if any(dfa.accept[state] for state in frontier):
+                yield from self.words(length)
+            # States reachable by a word of exactly the next length, dead ones are never expanded
+            frontier = {
+                dfa.table[state * k + symbol_class]
+                for state in frontier
+                for symbol_class in range(self.num_symbols)
+            }
+            frontier = {state for state in frontier if not dfa.dead[state]}
+            length += 1
+
+    def sample(self, length, k=1, seed=None):
+        # k words drawn uniformly from the accepted words of this length
+        dfa, width = self.dfa, self.dfa.num_classes
+        completions = self.completion_table(length)
+        if not completions[length][dfa.start]:
+            raise ValueError(f"No accepted words of length {length}")
+
+        rng = random.Random(seed)
+        words = []
+        for _ in range(k):
+            state = dfa.start
+            path = []
+            for remaining in range(length - 1, -1, -1):
+                counts = completions[remaining]
+                # Pick the next symbol with probability proportional to the words it leads to
+                pick = rng.randrange(completions[remaining + 1][state])
+                for symbol_class in range(self.num_symbols):
+                    target = dfa.table[state * width + symbol_class]
+                    if pick < counts[target]:
+                        break
+                    pick -= counts[target]
+                path.append(dfa.symbols[symbol_class])
+                state = target
+            words.append(''.join(path))
+        return words
@@ -0,0 +1,74 @@
+from bitset import BitsetNFA
+
+
+class LazyState:
+    def __init__(self, mask, accept, num_symbols):
+        self.mask = mask
+        self.accept = accept
+        self.next = [None] * num_symbols  # filled in the first time a symbol is read here
+
+
+class LazyDFA:
+    # Subset construction done on demand while reading input, like the RE2 DFA cache
+    def __init__(self, fa, cache_size=1024, on_full="flush"):
+        if on_full not in ("flush", "nfa"):
+            raise ValueError(f"Unknown cache policy: {on_full}")
+        if cache_size < 2:
+            # A flush keeps the start state and then adds the new one
+            raise ValueError(f"Cache size must be at least 2, got {cache_size}")
+        self.nfa = BitsetNFA(fa)
+        self.symbols = sorted(self.nfa.symbols)
+        self.symbol_index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.alive = self.nfa.alive_mask()
+        self.cache_size = cache_size
+        self.on_full = on_full
+        self.flushes = 0
+
+        self.dead = LazyState(0, False, len(self.symbols))
+        self.dead.next = [self.dead] * len(self.symbols)
+        self.cache = {}
+        self.start = self.lookup(self.nfa.start_mask & self.alive)
+
+    def lookup(self, mask):
+        if not mask:
+            return self.dead
+        state = self.cache.get(mask)
+        if state is not None:
+            return state
+
+        state = LazyState(mask, bool(mask & self.nfa.final_mask), len(self.symbols))
+        if len(self.cache) >= self.cache_size:
+            if self.on_full == "nfa":
+                return state  # not cached, the next step simulates the NFA from here
+            self.flush()
+        self.cache[mask] = state
+        return state
+
+    def flush(self):
+        # Drop every cached state, the start state is rebuilt right away
+        self.flushes += 1
+        self.cache = {}
+        self.start = self.lookup(self.start.mask)
+
+    def transition(self, state, symbol_class):
+        symbol = self.symbols[symbol_class]
+        target = self.lookup(self.nfa.move(state.mask, symbol) & self.alive)
+        if state.mask in self.cache and self.cache[state.mask] is state:
+            state.next[symbol_class] = target
+        return target
+
+    def validate(self, input_string):
+        index = self.symbol_index
+        state = self.start
+        dead = self.dead
+        for symbol in input_string:
+            symbol_class = index.get(symbol)
+            if symbol_class is None:
+                return False
+            target = state.next[symbol_class]
+            if target is None:
+                target = self.transition(state, symbol_class)
+            if target is dead:
+                return False
+            state = target
+        return state.accept
@@ -0,0 +1,119 @@
+from array import array
+from collections import deque
+
+from compiled import CompiledDFA
+
+ACCEPT = {
+    'intersection': lambda x, y: x and y,
+    'union': lambda x, y: x or y,
+    'difference': lambda x, y: x and not y,
+    'symmetric_difference': lambda x, y: x != y,
+}
+
+
+def align(a, b):
+    # Common alphabet and, for every symbol of it, the class it has in each automaton
+    symbols = sorted(set(a.symbols) | set(b.symbols))
+    a_classes = [a.symbol_index.get(symbol, a.num_classes - 1) for symbol in symbols]
+    b_classes = [b.symbol_index.get(symbol, b.num_classes - 1) for symbol in symbols]
+    return symbols, a_classes, b_classes
+
+
+def hopeless(a, b, x, y, accepts):
+    # A dead component can only ever answer False, so check whether the pair could still accept
+    a_values = (False,) if a.dead[x] else (False, True)
+    b_values = (False,) if b.dead[y] else (False, True)
+    return not any(accepts(p, q) for p in a_values for q in b_values)
+
+
+def product(a, b, operation):
+    # Only the pairs reachable from the pair of start states are built
+    accepts = ACCEPT[operation]
+    symbols, a_classes, b_classes = align(a, b)
+    k = len(symbols) + 1
+
+    start = (a.start, b.start)
+    index = {start: 0}
+    pairs = [start]
+    rows = []
+    queue = deque([start])
+    while queue:
+        x, y = queue.popleft()
+        row = []
+        for a_class, b_class in zip(a_classes, b_classes):
+            target = (a.step(x, a_class), b.step(y, b_class))
+            if target not in index:
+                index[target] = len(pairs)
+                pairs.append(target)
+                queue.append(target)
+            row.append(index[target])
+        rows.append(row)
+
+    sink = len(pairs)  # symbols outside the common alphabet end here
+    table = array('i', [sink]) * ((sink + 1) * k)
+    for state, row in enumerate(rows):
+        table[state * k:state * k + len(row)] = array('i', row)
+    accept = bytearray(sink + 1)
+    for state, (x, y) in enumerate(pairs):
+        accept[state] = accepts(bool(a.accept[x]), bool(b.accept[y]))
+    return CompiledDFA(symbols, table, accept, 0, pairs + [None])
+
+
+def complement(a):
+    # Words over the alphabet of a that a rejects, symbols outside the alphabet are still rejected
+    k = a.num_classes
+    outside = a.num_states
+    table = array('i', [outside]) * ((outside + 1) * k)
+    for state in range(a.num_states):
+        table[state * k:state * k + k - 1] = array('i', a.table[state * k:state * k + k - 1])
+    accept = bytearray(1 - flag for flag in a.accept) + bytearray(1)
+    return CompiledDFA(a.symbols, table, accept, a.start, a.state_names + [None])
+
+
+def find_witness(a, b, operation):
+    # Shortest word accepted by the product, explored breadth first and stopped at the first hit
+    accepts = ACCEPT[operation]
+    symbols, a_classes, b_classes = align(a, b)
+
+    start = (a.start, b.start)
+    parents = {start: None}
+    queue = deque([start])
+    while queue:
+        pair = queue.popleft()
+        x, y = pair
+        if accepts(bool(a.accept[x]), bool(b.accept[y])):
+            word = []
+            while parents[pair] is not None:
+                pair, symbol = parents[pair]
+                word.append(symbol)
+            return ''.join(reversed(word))
+        if hopeless(a, b, x, y, accepts):
+            continue
+        for symbol, a_class, b_class in zip(symbols, a_classes, b_classes):
+            target = (a.step(x, a_class), b.step(y, b_class))
+            if target not in parents:
+                parents[target] = (pair, symbol)
+                queue.append(target)
+    return None
+
+
+def shortest_word(a):
+    start = a.start
+    parents = {start: None}
+    queue = deque([start])
+    while queue:
+        state = queue.popleft()
+        if a.accept[state]:
+            word = []
+            while parents[state] is not None:
+                state, symbol = parents[state]
+                word.append(symbol)
+            return ''.join(reversed(word))
+        if a.dead[state]:
+            continue
+        for symbol_class, symbol in enumerate(a.symbols):
+            target = a.step(state, symbol_class)
+            if target not in parents:
+                parents[target] = (state, symbol)
+                queue.append(target)
+    return None
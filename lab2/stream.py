@@ -0,0 +1,60 @@
+import mmap
+import os
+
+CHUNK_SIZE = 1 << 20
+
+
+class Matcher:
+    # Resumable run of a CompiledDFA, the input can arrive in any number of chunks
+    def __init__(self, dfa):
+        self.dfa = dfa
+        self.state = dfa.start
+        self.consumed = 0  # number of symbols fed so far
+
+    def reset(self):
+        self.state = self.dfa.start
+        self.consumed = 0
+
+    def feed(self, chunk):
+        dfa = self.dfa
+        self.consumed += len(chunk)
+        if dfa.dead[self.state]:
+            return self  # nothing can be accepted anymore, skip the work
+
+        classes = dfa.encode(chunk)
+        if classes is None:
+            self.state = dfa.num_states - 1  # symbol outside the alphabet, go to the sink
+            return self
+
+        table, k, dead = dfa.table, dfa.num_classes, dfa.dead
+        state = self.state
+        for symbol_class in classes:
+            state = table[state * k + symbol_class]
+            if dead[state]:
+                break
+        self.state = state
+        return self
+
+    def feed_stream(self, stream, chunk_size=CHUNK_SIZE):
+        # Reads a file-like object (text or binary) until it is exhausted
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                return self
+            self.feed(chunk)
+
+    def accepted(self):
+        return bool(self.dfa.accept[self.state])
+
+
+def validate_file(dfa, path, chunk_size=CHUNK_SIZE):
+    # The file is memory-mapped and fed slice by slice, so memory use does not grow with its size
+    matcher = Matcher(dfa)
+    if os.path.getsize(path) == 0:
+        return matcher.accepted()
+    with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        for offset in range(0, len(mapped), chunk_size):
+            matcher.feed(mapped[offset:offset + chunk_size])
+            if dfa.dead[matcher.state]:
+                break
+    return matcher.accepted()
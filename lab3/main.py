@@ -19,6 +19,8 @@ class TokenType:
 
 
 class Token:
+    __slots__ = ('type', 'value')
+    
     def __init__(self, type, value):
         self.type = type
         self.value = value
@@ -47,36 +49,33 @@ class Lexer:
     
     def integer(self):
         # Handle complex number parsing (integers and floats)
-        result = ''
+        start = self.pos
         is_float = False
         
         if self.current_char == '-':
-            result += self.current_char
             self.move_forward()
         
         while self.current_char is not None and self.current_char.isdigit():
-            result += self.current_char
             self.move_forward()
         
         if self.current_char == '.':
             is_float = True
-            result += self.current_char
             self.move_forward()
             
             while self.current_char is not None and self.current_char.isdigit():
-                result += self.current_char
                 self.move_forward()
         
+        result = self.text[start:self.pos]  # slice once instead of growing a string per character
         return Token(TokenType.FLOAT if is_float else TokenType.INTEGER, 
                     float(result) if is_float else int(result))
     
     def identifier(self):
         # Parsing identifiers is tricky due to function and variable name rules
-        result = ''
+        start = self.pos
         while (self.current_char is not None and 
                (self.current_char.isalnum() or self.current_char == '_')):
-            result += self.current_char
             self.move_forward()
+        result = self.text[start:self.pos]
 
         if result == 'sin':
             return Token(TokenType.SIN, result)
@@ -122,25 +121,32 @@ class Lexer:
             self.error()
         return Token(TokenType.EOF, None)
     
+    def tokens(self):
+        # Yields tokens one at a time up to and including EOF
+        while True:
+            token = self.get_next_token()
+            yield token
+            if token.type == TokenType.EOF:  # stop when EOF is reached
+                return
+    
 
-def tokenize_file(file_path):
+def iter_tokens(file_path):
+    # Tokens of a file produced lazily, the file is lexed one line at a time
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"File not found: {file_path}")
     
     with open(file_path, 'r') as file:
-        all_tokens = []
-        
-        content = file.read()
-        lexer = Lexer(content)
-        
-        while True:
-            token = lexer.get_next_token()
-            all_tokens.append(token)
-            
-            if token.type == TokenType.EOF:  # stop when EOF is reached
-                break
+        for line in file:
+            for token in Lexer(line).tokens():
+                if token.type == TokenType.EOF:
+                    break
+                yield token
+    
+    yield Token(TokenType.EOF, None)
+
 
-        return all_tokens
+def tokenize_file(file_path):
+    return list(iter_tokens(file_path))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,238 @@
+from array import array
+
+
+class Literal:
+    def __init__(self, text):
+        self.text = text
+
+
+class Concat:
+    def __init__(self, items):
+        self.items = items
+
+
+class Alternation:
+    def __init__(self, options):
+        self.options = options
+
+
+class Repeat:
+    def __init__(self, node, low, high):
+        self.node = node
+        self.low = low
+        self.high = high  # None for no upper bound
+
+
+class PatternParser:
+    # Same syntax as RegexMachine.parse_pattern, read into an AST:
+    #   alternation: concat ('|' concat)*       concat: repeat*
+    #   repeat: atom ('?' | '*' | '+' | '{' n '}')*       atom: '(' alternation ')' | digits | char
+    # Groups may nest, and quantifiers apply to any atom, groups included.
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.pos = 0
+
+    def peek(self):
+        return self.pattern[self.pos] if self.pos < len(self.pattern) else None
+
+    def parse(self):
+        node = self.alternation()
+        if self.pos != len(self.pattern):
+            raise ValueError(f"Unmatched ) at position {self.pos}")
+        return node
+
+    def alternation(self):
+        options = [self.concat()]
+        while self.peek() == '|':
+            self.pos += 1
+            options.append(self.concat())
+        return options[0] if len(options) == 1 else Alternation(options)
+
+    def concat(self):
+        items = []
+        while self.peek() not in (None, '|', ')'):
+            items.append(self.repeat())
+        return items[0] if len(items) == 1 else Concat(items)
+
+    def repeat(self):
+        node = self.atom()
+        while self.peek() is not None and self.peek() in '?*+{':
+            symbol = self.peek()
+            self.pos += 1
+            if symbol == '?':
+                node = Repeat(node, 0, 1)
+            elif symbol == '*':
+                node = Repeat(node, 0, None)
+            elif symbol == '+':
+                node = Repeat(node, 1, None)
+            else:
+                end = self.pattern.find('}', self.pos)
+                if end == -1:
+                    raise ValueError("Unmatched {")
+                count = int(self.pattern[self.pos:end])
+                node = Repeat(node, count, count)
+                self.pos = end + 1
+        return node
+
+    def atom(self):
+        char = self.peek()
+        if char == '(':
+            self.pos += 1
+            node = self.alternation()
+            if self.peek() != ')':
+                raise ValueError("Unmatched (")
+            self.pos += 1
+            return node
+        if char in '?*+{':
+            raise ValueError(f"Nothing to repeat before '{char}' at position {self.pos}")
+        start = self.pos
+        self.pos += 1
+        # A run of digits is one literal, as in parse_pattern
+        if char.isdigit():
+            while self.peek() is not None and self.peek().isdigit():
+                self.pos += 1
+        return Literal(self.pattern[start:self.pos])
+
+
+class NFA:
+    # Thompson construction, every state has epsilon moves and at most one character move
+    def __init__(self):
+        self.epsilon = []
+        self.moves = []  # (char, target) or None per state
+
+    def new_state(self):
+        self.epsilon.append([])
+        self.moves.append(None)
+        return len(self.epsilon) - 1
+
+    def build(self, node):
+        # Returns (start, end) of the fragment for node
+        start = self.new_state()
+        if isinstance(node, Literal):
+            end = start
+            for char in node.text:
+                target = self.new_state()
+                self.moves[end] = (char, target)
+                end = target
+            return start, end
+        if isinstance(node, Concat):
+            end = start
+            for item in node.items:
+                item_start, item_end = self.build(item)
+                self.epsilon[end].append(item_start)
+                end = item_end
+            return start, end
+        if isinstance(node, Alternation):
+            end = self.new_state()
+            for option in node.options:
+                option_start, option_end = self.build(option)
+                self.epsilon[start].append(option_start)
+                self.epsilon[option_end].append(end)
+            return start, end
+
+        # Repeat: low required copies, then optional copies or a loop for an unbounded star. The
+        # fragment ends in a fresh state without moves of its own: an outer skip edge to a state
+        # that still has the loop on it would run the loop without what comes before it.
+        end = start
+        for _ in range(node.low):
+            copy_start, copy_end = self.build(node.node)
+            self.epsilon[end].append(copy_start)
+            end = copy_end
+        final = self.new_state()
+        if node.high is None:
+            loop_start, loop_end = self.build(node.node)
+            self.epsilon[end].extend((loop_start, final))
+            self.epsilon[loop_end].append(end)
+            return start, final
+        skips = []
+        for _ in range(node.high - node.low):
+            copy_start, copy_end = self.build(node.node)
+            self.epsilon[end].append(copy_start)
+            skips.append(end)
+            end = copy_end
+        self.epsilon[end].append(final)
+        for state in skips:
+            self.epsilon[state].append(final)
+        return start, final
+
+    def closure(self, states):
+        stack = list(states)
+        closed = set(states)
+        while stack:
+            for target in self.epsilon[stack.pop()]:
+                if target not in closed:
+                    closed.add(target)
+                    stack.append(target)
+        return frozenset(closed)
+
+
+class CharClasses(dict):
+    # str.translate mapping, characters outside the pattern fall into class 0
+    def __missing__(self, key):
+        return 0
+
+
+class CompiledPattern:
+    # Dense DFA from subset construction: state 0 is dead, 1 is the start, rows are indexed by
+    # character class, so matching costs one table lookup per character
+    def __init__(self, pattern):
+        self.pattern = pattern
+        nfa = NFA()
+        start, end = nfa.build(PatternParser(pattern).parse())
+
+        alphabet = sorted({move[0] for move in nfa.moves if move is not None})
+        self.char_classes = CharClasses({ord(char): number for number, char in enumerate(alphabet, start=1)})
+        self.num_classes = len(alphabet) + 1
+
+        start_subset = nfa.closure([start])
+        index = {frozenset(): 0, start_subset: 1}
+        subsets = [frozenset(), start_subset]
+        self.table = array('i', [0] * self.num_classes)
+        self.accept = bytearray([0])
+        position = 1
+        while position < len(subsets):
+            subset = subsets[position]
+            targets = {}
+            for state in subset:
+                move = nfa.moves[state]
+                if move is not None:
+                    targets.setdefault(self.char_classes[ord(move[0])], []).append(move[1])
+            row = [0] * self.num_classes
+            for symbol_class, states in targets.items():
+                target_subset = nfa.closure(states)
+                if target_subset not in index:
+                    index[target_subset] = len(subsets)
+                    subsets.append(target_subset)
+                row[symbol_class] = index[target_subset]
+            self.table.extend(row)
+            self.accept.append(end in subset)
+            position += 1
+        self.num_states = len(subsets)
+
+    def classify(self, text):
+        classes = text.translate(self.char_classes)
+        if self.num_classes < 256:
+            return classes.encode('latin-1')
+        return [ord(char) for char in classes]
+
+    def match(self, text):
+        # Length of the longest prefix of text in the language, None if there is none
+        table, k, accept = self.table, self.num_classes, self.accept
+        state = 1
+        longest = 0 if accept[state] else None
+        for position, symbol_class in enumerate(self.classify(text), start=1):
+            state = table[state * k + symbol_class]
+            if not state:
+                break
+            if accept[state]:
+                longest = position
+        return longest
+
+    def fullmatch(self, text):
+        table, k = self.table, self.num_classes
+        state = 1
+        for symbol_class in self.classify(text):
+            state = table[state * k + symbol_class]
+            if not state:
+                return False
+        return bool(self.accept[state])
@@ -0,0 +1,117 @@
+import heapq
+import os
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from main import RegexMachine
+
+RUN_SIZE = 1_000_000  # most strings a worker holds at once, and so the length of a sorted run
+WRITE_LINES = 65_536  # lines joined into one write call
+BUFFER_SIZE = 1 << 20
+MERGE_WIDTH = 128  # most runs open at once while merging, well under the usual file descriptor limits
+
+
+def write_lines(file, strings):
+    # One big write per WRITE_LINES strings instead of one per line
+    count = 0
+    strings = iter(strings)
+    while True:
+        chunk = list(islice(strings, WRITE_LINES))
+        if not chunk:
+            return count
+        file.write('\n'.join(chunk) + '\n')
+        count += len(chunk)
+
+
+def read_lines(path):
+    with open(path, 'r', buffering=BUFFER_SIZE) as file:
+        for line in file:
+            yield line[:-1]
+
+
+def generate_shard(pattern, k, n, path, unique):
+    # Runs in a worker process: shard k of n of one pattern into its own file,
+    # sorted and without duplicates when unique is set
+    strings = RegexMachine(pattern).shard(k, n)
+    if unique:
+        strings = sorted(set(strings))
+    with open(path, 'w', buffering=BUFFER_SIZE) as file:
+        return write_lines(file, strings)
+
+
+def unique_merge(runs):
+    # Sorted runs merged into one sorted stream, each string kept once; memory is one line per run
+    previous = None
+    for string in heapq.merge(*map(read_lines, runs)):
+        if string != previous:
+            yield string
+            previous = string
+
+
+def merge_runs(paths, directory):
+    # Merges MERGE_WIDTH runs at a time into longer runs until one merge can take them all
+    generation = 0
+    while len(paths) > MERGE_WIDTH:
+        merged = []
+        for first in range(0, len(paths), MERGE_WIDTH):
+            group = paths[first:first + MERGE_WIDTH]
+            path = os.path.join(directory, f'merge-{generation}-{first}.txt')
+            with open(path, 'w', buffering=BUFFER_SIZE) as file:
+                write_lines(file, unique_merge(group))
+            for run in group:
+                os.remove(run)
+            merged.append(path)
+        paths = merged
+        generation += 1
+    return paths
+
+
+def generate_batch(patterns, output_path, unique=False, workers=None, temp_dir=None):
+    # Every pattern split into shards of at most RUN_SIZE strings, generated across a process pool.
+    # Without unique the output keeps pattern order; with unique it is sorted and deduplicated
+    # by an external merge of the sorted shards, in passes of at most MERGE_WIDTH files.
+    # Returns the number of lines written.
+    tasks = []
+    for pattern in patterns:
+        shards = max(1, -(-RegexMachine(pattern).count() // RUN_SIZE))
+        tasks.extend((pattern, k, shards) for k in range(shards))
+
+    with tempfile.TemporaryDirectory(dir=temp_dir) as directory:
+        paths = [os.path.join(directory, f'{number}.txt') for number in range(len(tasks))]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(
+                generate_shard,
+                [pattern for pattern, _, _ in tasks],
+                [k for _, k, _ in tasks],
+                [n for _, _, n in tasks],
+                paths,
+                [unique] * len(tasks),
+            ))
+
+        with open(output_path, 'w', buffering=BUFFER_SIZE) as output:
+            if unique:
+                return write_lines(output, unique_merge(merge_runs(paths, directory)))
+            count = 0
+            for path in paths:
+                with open(path, 'r', buffering=BUFFER_SIZE) as shard:
+                    while True:
+                        block = shard.read(BUFFER_SIZE)
+                        if not block:
+                            break
+                        output.write(block)
+                        count += block.count('\n')
+            return count
+
+
+if __name__ == '__main__':
+    # python batch.py OUTPUT [--unique] PATTERN...
+    arguments = sys.argv[1:]
+    unique = '--unique' in arguments
+    arguments = [argument for argument in arguments if argument != '--unique']
+    if len(arguments) < 2:
+        print('Usage: python batch.py OUTPUT [--unique] PATTERN...')
+        sys.exit(1)
+    lines = generate_batch(arguments[1:], arguments[0], unique=unique)
+    print(f'Wrote {lines} strings to {arguments[0]}')
@@ -0,0 +1,37 @@
+import random
+import re
+import time
+
+from main import RegexMachine
+
+
+def enumerate_and_compare(machine, text):
+    # What matching took before compile(): generate the language until text shows up
+    return any(string == text for string in machine.generate_results(machine.parse_pattern()))
+
+
+def benchmark_matching(pattern='R*S(T|U|V)W(X|Y|Z){6}', queries=200, seed=0):
+    machine = RegexMachine(pattern)
+    rng = random.Random(seed)
+    total = machine.count()
+    texts = [machine.nth(rng.randrange(total)) for _ in range(queries // 2)]
+    texts += [text[:-1] + 'Q' for text in texts]  # just as many strings outside the language
+    print(f'Matching {len(texts)} strings against {pattern} ({total} strings when generated)')
+
+    start = time.perf_counter()
+    expected = [enumerate_and_compare(machine, text) for text in texts]
+    print(f'{"enumerate and compare":<24} {time.perf_counter() - start:8.3f} s')
+
+    start = time.perf_counter()
+    compiled = machine.compile()
+    found = [compiled.fullmatch(text) for text in texts]
+    print(f'{"compiled DFA":<24} {time.perf_counter() - start:8.3f} s  ({compiled.num_states} states)')
+    assert found == expected
+
+    # A repeat inside an optional group must not loop without the characters before it
+    for group, text in (('(XY*)?', 'YY'), ('(XY+)?', 'Y'), ('(XY*)?', 'XYY')):
+        assert RegexMachine(group).fullmatch(text) == bool(re.fullmatch(group, text))
+
+
+if __name__ == '__main__':
+    benchmark_matching()
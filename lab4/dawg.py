@@ -0,0 +1,259 @@
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+
+FORMAT_VERSION = 1
+MAGIC = b'DAWG'
+# magic, format version, byte order of the arrays, states, edges
+HEADER = struct.Struct('<4sBBxxII')
+BYTE_ORDER = 0 if sys.byteorder == 'little' else 1
+
+
+class Node:
+    __slots__ = ('edges', 'final')
+
+    def __init__(self):
+        self.edges = {}  # character -> Node, filled in sorted order
+        self.final = False
+
+
+class DAWGBuilder:
+    # Incremental construction from sorted words (Daciuk et al.): once a word is added, the part
+    # of the previous word past their common prefix can no longer change, so it is merged into
+    # an equal registered state right away. Only that path and the register stay in memory.
+    def __init__(self):
+        self.root = Node()
+        self.register = {}  # (final, edges by identity) -> the one state with that signature
+        self.unchecked = []  # (parent, character, child) along the last word, not yet merged
+        self.previous = None
+
+    def add(self, word):
+        if self.previous is not None and word <= self.previous:
+            if word == self.previous:
+                return
+            raise ValueError(f"Words must be added in sorted order, got {word!r} after {self.previous!r}")
+        common = 0
+        if self.previous is not None:
+            for char, previous_char in zip(word, self.previous):
+                if char != previous_char:
+                    break
+                common += 1
+        self.merge(common)
+
+        node = self.unchecked[-1][2] if self.unchecked else self.root
+        for char in word[common:]:
+            child = Node()
+            node.edges[char] = child
+            self.unchecked.append((node, char, child))
+            node = child
+        node.final = True
+        self.previous = word
+
+    def merge(self, down_to):
+        while len(self.unchecked) > down_to:
+            parent, char, child = self.unchecked.pop()
+            signature = (child.final, tuple((label, id(target)) for label, target in child.edges.items()))
+            existing = self.register.get(signature)
+            if existing is None:
+                self.register[signature] = child
+            else:
+                parent.edges[char] = existing
+
+    def finish(self):
+        self.merge(0)
+        return DAWG.from_nodes(self.root)
+
+
+class DAWG:
+    # Minimal acyclic automaton in flat arrays: the edges of state s are offsets[s]:offsets[s + 1]
+    # in labels (code points, sorted) and targets. State 0 is the root, every edge goes to a
+    # higher numbered state.
+    def __init__(self, offsets, labels, targets, final):
+        self.offsets = offsets
+        self.labels = labels
+        self.targets = targets
+        self.final = final
+        self.num_states = len(final)
+        self.counts = None
+
+    @classmethod
+    def from_sorted(cls, words):
+        builder = DAWGBuilder()
+        for word in words:
+            builder.add(word)
+        return builder.finish()
+
+    @classmethod
+    def from_file(cls, path):
+        # One word per line, sorted, e.g. the output of batch.generate_batch(..., unique=True)
+        with open(path, 'r') as file:
+            return cls.from_sorted(line[:-1] if line.endswith('\n') else line for line in file)
+
+    @classmethod
+    def from_parts(cls, parts):
+        # Concatenation of finite sets of strings, as RegexMachine.parse_pattern returns them, built
+        # without listing the words: subset construction over (part, item, characters read)
+        # positions, each subset merged into an equal registered state once its targets are.
+        end = len(parts)
+        accept = (end, 0, 0)
+
+        def enter(part):
+            if part == end:
+                return [accept]
+            return [(part, item, 0) for item in range(len(parts[part]))]
+
+        def closure(positions):
+            # A finished item goes on to every item of the next part
+            closed = set()
+            stack = list(positions)
+            while stack:
+                position = stack.pop()
+                if position in closed:
+                    continue
+                closed.add(position)
+                part, item, read = position
+                if part < end and read == len(parts[part][item]):
+                    stack.extend(enter(part + 1))
+            return frozenset(closed)
+
+        def transitions(subset):
+            targets = {}
+            for part, item, read in subset:
+                if part < end and read < len(parts[part][item]):
+                    targets.setdefault(parts[part][item][read], []).append((part, item, read + 1))
+            return [(char, closure(targets[char])) for char in sorted(targets)]
+
+        if not parts:
+            return cls.from_nodes(Node())
+        root = closure(enter(0))
+        nodes = {}  # subset -> its registered node
+        register = {}
+        pending = {}  # subset -> its transitions, while the targets are built
+        stack = [root]
+        while stack:
+            subset = stack[-1]
+            if subset in nodes:
+                stack.pop()
+            elif subset not in pending:
+                pending[subset] = transitions(subset)
+                stack.extend(target for _, target in pending[subset] if target not in nodes)
+            else:
+                stack.pop()
+                node = Node()
+                node.final = accept in subset
+                for char, target in pending.pop(subset):
+                    child = nodes[target]
+                    if child.final or child.edges:  # a part without items leaves dead states
+                        node.edges[char] = child
+                signature = (node.final, tuple((label, id(target)) for label, target in node.edges.items()))
+                nodes[subset] = register.setdefault(signature, node)
+        return cls.from_nodes(nodes[root])
+
+    @classmethod
+    def from_nodes(cls, root):
+        # Reverse postorder numbers parents before children
+        order = []
+        seen = {id(root)}
+        stack = [(root, iter(root.edges.values()))]
+        while stack:
+            node, children = stack[-1]
+            for child in children:
+                if id(child) not in seen:
+                    seen.add(id(child))
+                    stack.append((child, iter(child.edges.values())))
+                    break
+            else:
+                order.append(node)
+                stack.pop()
+        order.reverse()
+        number = {id(node): index for index, node in enumerate(order)}
+
+        offsets, labels, targets = array('I', [0]), array('I'), array('I')
+        final = bytearray()
+        for node in order:
+            for char, target in node.edges.items():
+                labels.append(ord(char))
+                targets.append(number[id(target)])
+            offsets.append(len(labels))
+            final.append(node.final)
+        return cls(offsets, labels, targets, final)
+
+    def step(self, state, char):
+        # Target of the edge labelled char, -1 when there is none
+        code = ord(char)
+        low, high = self.offsets[state], self.offsets[state + 1]
+        position = bisect_left(self.labels, code, low, high)
+        if position < high and self.labels[position] == code:
+            return self.targets[position]
+        return -1
+
+    def walk(self, text):
+        state = 0
+        for char in text:
+            state = self.step(state, char)
+            if state < 0:
+                break
+        return state
+
+    def __contains__(self, word):
+        state = self.walk(word)
+        return state >= 0 and bool(self.final[state])
+
+    def has_prefix(self, prefix):
+        # Every state but an empty root leads to some word, so reaching one is enough
+        state = self.walk(prefix)
+        return state >= 0 and (bool(self.final[state]) or self.offsets[state + 1] > self.offsets[state])
+
+    def words(self, prefix=''):
+        # Words starting with prefix, in sorted order
+        state = self.walk(prefix)
+        if state < 0:
+            return
+        stack = [(state, prefix)]
+        while stack:
+            state, word = stack.pop()
+            if self.final[state]:
+                yield word
+            for position in range(self.offsets[state + 1] - 1, self.offsets[state] - 1, -1):
+                stack.append((self.targets[position], word + chr(self.labels[position])))
+
+    def __len__(self):
+        # Words below every state, summed from the leaves up, which are the highest numbers
+        if self.counts is None:
+            self.counts = [0] * self.num_states
+            for state in range(self.num_states - 1, -1, -1):
+                total = self.final[state]
+                for position in range(self.offsets[state], self.offsets[state + 1]):
+                    total += self.counts[self.targets[position]]
+                self.counts[state] = total
+        return self.counts[0] if self.num_states else 0
+
+    def to_bytes(self):
+        header = HEADER.pack(MAGIC, FORMAT_VERSION, BYTE_ORDER, self.num_states, len(self.labels))
+        return (header + bytes(array('I', self.offsets)) + bytes(array('I', self.labels))
+                + bytes(array('I', self.targets)) + bytes(self.final))
+
+    @classmethod
+    def from_bytes(cls, data):
+        # The arrays are views into data, nothing is copied
+        magic, version, byte_order, num_states, num_edges = HEADER.unpack_from(data)
+        if magic != MAGIC or version != FORMAT_VERSION or byte_order != BYTE_ORDER:
+            raise ValueError("Not a DAWG written by this version on this byte order")
+        view = memoryview(data)
+        offset = HEADER.size
+        arrays = []
+        for length in (num_states + 1, num_edges, num_edges):
+            arrays.append(view[offset:offset + length * 4].cast('I'))
+            offset += length * 4
+        final = view[offset:offset + num_states]
+        return cls(*arrays, final)
+
+    def save(self, path):
+        with open(path, 'wb') as file:
+            file.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as file:
+            return cls.from_bytes(file.read())
@@ -1,8 +1,15 @@
+from itertools import islice
+
+from automaton import CompiledPattern
+from dawg import DAWG
+
+
 class RegexMachine:
     MAX_REPEAT = 5  # Used for '*' and '+'
 
     def __init__(self, pattern):
         self.pattern = pattern
+        self.compiled = None
 
     def find_matching(self, start, open_char, close_char):
         depth = 0
@@ -37,12 +44,10 @@ class RegexMachine:
                     raise ValueError("Nothing to repeat before '{...}'")
                 last = parts.pop()
 
-                # If last is a group (e.g., ['X', 'Y', 'Z']), compute full Cartesian power
+                # If last is a group (e.g., ['X', 'Y', 'Z']), repeat it as separate parts;
+                # product() then walks the Cartesian power lazily in the same order
                 if len(last) > 1:
-                    repeated = [[]]
-                    for _ in range(repeat):
-                        repeated = [r + [c] for r in repeated for c in last]
-                    parts.append([''.join(r) for r in repeated])
+                    parts.extend([last] * repeat)
                 else:
                     # Just repeat the single element, like ['D'] -> ['DDD']
                     parts.append([last[0] * repeat])
@@ -77,22 +82,107 @@ class RegexMachine:
         return parts
 
     @staticmethod
-    def product(parts):
+    def digits(parts, index):
+        # Mixed-radix digits of index, one per part with the last part as the lowest digit;
+        # None when index is past the last combination
+        indices = []
+        for part in reversed(parts):
+            index, digit = divmod(index, len(part))
+            indices.append(digit)
+        if index:
+            return None
+        indices.reverse()
+        return indices
+
+    @staticmethod
+    def product(parts, offset=0):
+        # Odometer over one index per part, the last part turning fastest (itertools.product order).
+        # prefixes[k] joins the chosen items of parts[:k], so a turn only rebuilds what follows the
+        # digit that moved; memory stays proportional to the pattern, not to the output.
         if not parts:
-            return []
+            return
+
+        *outer, innermost = parts
+        indices = RegexMachine.digits(parts, offset)
+        if indices is None:
+            return  # offset is past the last combination
+        start = indices.pop()
+
+        prefixes = ['']
+        for part, index in zip(outer, indices):
+            prefixes.append(prefixes[-1] + part[index])
+
+        while True:
+            base = prefixes[-1]
+            for position in range(start, len(innermost)):
+                yield base + innermost[position]
+            start = 0
+
+            position = len(outer) - 1
+            while position >= 0 and indices[position] + 1 == len(outer[position]):
+                indices[position] = 0
+                position -= 1
+            if position < 0:
+                return
+            indices[position] += 1
+            for k in range(position, len(outer)):
+                prefixes[k + 1] = prefixes[k] + outer[k][indices[k]]
+
+    def generate_results(self, parts, offset=0, limit=None):
+        # Strings from number offset on, at most limit of them, produced one at a time
+        results = self.product(parts, offset)
+        if limit is not None:
+            results = islice(results, limit)
+        yield from results
 
-        result = ['']
+    @staticmethod
+    def size(parts):
+        if not parts:
+            return 0
+        total = 1
         for part in parts:
-            temp = []
-            for prefix in result:
-                for item in part:
-                    temp.append(prefix + item)
-            result = temp
-        return result
+            total *= len(part)
+        return total
+
+    def count(self):
+        # Size of the language, the product of the part sizes, found without generating anything
+        return self.size(self.parse_pattern())
+
+    def nth(self, index):
+        # The string generate_results would produce at position index
+        parts = self.parse_pattern()
+        total = self.size(parts)
+        if index < 0:
+            index += total
+        if not 0 <= index < total:
+            raise IndexError(f"Index {index} out of range for {total} strings")
+        return ''.join(part[digit] for part, digit in zip(parts, self.digits(parts, index)))
+
+    def shard(self, k, n):
+        # Shard k of n: a contiguous slice of the output, disjoint from the other shards
+        if not 0 <= k < n:
+            raise ValueError(f"Shard {k} does not exist out of {n}")
+        parts = self.parse_pattern()
+        total = self.size(parts)
+        start, end = total * k // n, total * (k + 1) // n
+        return self.generate_results(parts, start, end - start)
+
+    def compile(self):
+        # DFA for matching, where '*' and '+' have no MAX_REPEAT limit
+        if self.compiled is None:
+            self.compiled = CompiledPattern(self.pattern)
+        return self.compiled
+
+    def match(self, text):
+        return self.compile().match(text)
+
+    def fullmatch(self, text):
+        return self.compile().fullmatch(text)
 
-    def generate_results(self, parts):
-        for combination in self.product(parts):
-            yield ''.join(combination)
+    def dawg(self):
+        # Minimal acyclic automaton of the generated language, built from the parts without
+        # generating the strings
+        return DAWG.from_parts(self.parse_pattern())
 
     def process(self):
         print(f"Generated strings for pattern: {self.pattern}")
@@ -101,10 +191,11 @@ class RegexMachine:
             print(string)
         print()
 
-patterns = [
-    '(S|T)(U|V)W*Y+24', 
-    'L(M|N)D{3}P*Q(2|3)',
-    'R*S(T|U|V)W(X|Y|Z){2}',
-]
-machines = [ RegexMachine(pattern) for pattern in patterns ]
-[ machine.process() for machine in machines ]
+if __name__ == '__main__':
+    patterns = [
+        '(S|T)(U|V)W*Y+24', 
+        'L(M|N)D{3}P*Q(2|3)',
+        'R*S(T|U|V)W(X|Y|Z){2}',
+    ]
+    machines = [ RegexMachine(pattern) for pattern in patterns ]
+    [ machine.process() for machine in machines ]
@@ -0,0 +1,199 @@
+import math
+import os
+import random
+import re
+import tempfile
+import time
+
+import numpy as np
+
+from evaluator import compile_program
+from main import (AssignNode, DFALexer, Lexer, NumberNode, Parser, UnaryOpNode, VariableNode,
+                  parse_file)
+from incremental import Document
+from optimizer import count_nodes, optimize
+from parallel import parse_file_parallel
+
+
+def generate_script(size, seed=0):
+    # Random statements in the lab6 language until the text reaches size characters
+    rng = random.Random(seed)
+    names = ['x', 'y', 'z', 'result', 'trig', 'value_1']
+    lines = []
+    length = 0
+    while length < size:
+        left = rng.choice(names)
+        operand = rng.choice([str(rng.randint(0, 1000)), f'{rng.random() * 100:.3f}', rng.choice(names)])
+        expr = f'{rng.choice(names)} {rng.choice("+-*/")} {operand}'
+        if rng.random() < 0.3:
+            expr = f'{rng.choice(["sin", "cos"])}({expr}) / 2.5'
+        line = f'{left} = {expr}\n'
+        lines.append(line)
+        length += len(line)
+    return ''.join(lines)
+
+
+def naive_tokenize(text):
+    # Pattern by pattern at every position, recompiling each time (the previous implementation)
+    count = 0
+    position = 0
+    while position < len(text):
+        for pattern, token_type in Lexer.token_patterns:
+            match = re.compile(pattern).match(text, position)
+            if match:
+                count += token_type is not None
+                position = match.end()
+                break
+        else:
+            raise Exception(f'Invalid token at position {position}')
+    return count
+
+
+def measure(name, function, argument, size=None):
+    start = time.perf_counter()
+    function(argument)
+    elapsed = time.perf_counter() - start
+    size = len(argument) if size is None else size
+    print(f'{name:<24} {elapsed:8.3f} s  {size / elapsed / 1e6:8.2f} MB/s')
+
+
+def benchmark_tokenize(size=2_000_000):
+    text = generate_script(size)
+    print(f'Tokenizing {len(text) / 1e6:.1f} MB')
+    measure('naive per-pattern loop', naive_tokenize, text)
+    measure('master regex', lambda source: Lexer(source).tokenize(), text)
+    measure('generated DFA', lambda source: DFALexer(source).tokenize(), text)
+
+
+def benchmark_parse_parallel(size=8_000_000, workers=None):
+    text = generate_script(size)
+    with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as file:
+        file.write(text)
+    try:
+        print(f'Parsing {len(text) / 1e6:.1f} MB with {workers or os.cpu_count()} workers')
+        measure('parse_file', parse_file, file.name, len(text))
+        measure('parse_file_parallel', lambda path: parse_file_parallel(path, workers), file.name, len(text))
+    finally:
+        os.unlink(file.name)
+
+
+def tree_walk(node, variables):
+    # Naive recursive evaluator used as the baseline
+    if isinstance(node, NumberNode):
+        return node.value
+    if isinstance(node, VariableNode):
+        return variables[node.name]
+    if isinstance(node, AssignNode):
+        variables[node.variable.name] = tree_walk(node.value, variables)
+        return variables[node.variable.name]
+    if isinstance(node, UnaryOpNode):
+        value = tree_walk(node.expr, variables)
+        if node.op.value == 'sin':
+            return math.sin(value)
+        if node.op.value == 'cos':
+            return math.cos(value)
+        return -value
+    left, right = tree_walk(node.left, variables), tree_walk(node.right, variables)
+    if node.op.value == '+':
+        return left + right
+    if node.op.value == '-':
+        return left - right
+    if node.op.value == '*':
+        return left * right
+    return left / right
+
+
+def benchmark_evaluate(runs=2000):
+    source = 'x = 5 + 2\ny = x * 3\nz = sin(y) / 2.5 + cos(x - y) * (x + -y)\nw = z * z - y / x\n' * 10
+    # Scripts may use _ as a variable, expression statements must not clobber it or a constant known for it
+    source += '_ = 3\nx + 1\ny = _\n'
+    statements = Parser(Lexer(source).tokens()).parse()
+    programs = {backend: compile_program(statements, backend) for backend in ('stack', 'python')}
+    optimized = optimize(statements)
+    programs['optimized'] = compile_program(optimized)
+    expected = programs['stack'].run()
+    for name, program in programs.items():
+        assert program.run() == expected, f'{name} disagrees with the stack machine'
+
+    def walk_all(_):
+        for _ in range(runs):
+            variables = {}
+            for statement in statements:
+                tree_walk(statement, variables)
+
+    def run_all(program):
+        for _ in range(runs):
+            program.run()
+
+    print(f'Evaluating {len(statements)} statements {runs} times, '
+          f'{count_nodes(statements)} nodes before optimizing and {count_nodes(optimized)} after')
+    for name, function, argument in [('tree walker', walk_all, None),
+                                     ('stack machine', run_all, programs['stack']),
+                                     ('python bytecode', run_all, programs['python']),
+                                     ('optimized bytecode', run_all, programs['optimized'])]:
+        start = time.perf_counter()
+        function(argument)
+        print(f'{name:<24} {time.perf_counter() - start:8.3f} s')
+
+
+def benchmark_vectorized(rows=200_000):
+    source = 'y = x * 3\nz = sin(y) / 2.5 + cos(x - y) * (x + -y)\nw = z * z - y / (x + 1)\n'
+    statements = Parser(Lexer(source).tokens()).parse()
+    column = np.random.default_rng(0).random(rows)
+    program = compile_program(statements)
+    arrays = compile_program(statements, 'numpy')
+
+    print(f'Evaluating {len(statements)} statements for {rows} bindings of x')
+    start = time.perf_counter()
+    for x in column.tolist():
+        program.run({'x': x})
+    print(f'{"python bytecode per row":<24} {time.perf_counter() - start:8.3f} s')
+    start = time.perf_counter()
+    arrays.run({'x': column})
+    print(f'{"numpy arrays":<24} {time.perf_counter() - start:8.3f} s')
+
+
+def benchmark_deep_nesting(depths=(25_000, 50_000, 100_000)):
+    # Time should double with the depth, and nothing may hit the recursion limit
+    shapes = {
+        'parentheses': lambda depth: '(' * depth + 'x' + ')' * depth,
+        'unary minus': lambda depth: '-' * depth + 'x',
+        'sin calls': lambda depth: 'sin(' * depth + 'x' + ')' * depth,
+        'subtractions': lambda depth: 'x' + ' - x' * depth,
+    }
+    for name, build in shapes.items():
+        for depth in depths:
+            tokens = Lexer(build(depth)).tokenize()
+            start = time.perf_counter()
+            statements = Parser(tokens).parse()
+            parsed = time.perf_counter()
+            text = repr(statements)
+            print(f'{name:<14} {depth:>8}  parse {parsed - start:6.3f} s  '
+                  f'format {time.perf_counter() - parsed:6.3f} s  ({len(text)} chars)')
+
+
+def benchmark_incremental(size=2_000_000, edits=200):
+    text = generate_script(size)
+    rng = random.Random(0)
+    start = time.perf_counter()
+    Parser(Lexer(text).tokens()).parse()
+    full = time.perf_counter() - start
+    document = Document(text)
+
+    start = time.perf_counter()
+    for _ in range(edits):
+        # Type a character somewhere in the script and delete it again
+        offset = rng.randrange(len(document))
+        document.edit(offset, 0, ' ')
+        document.edit(offset, 1, '')
+    incremental = (time.perf_counter() - start) / (2 * edits)
+    print(f'Reparsing {len(text) / 1e6:.1f} MB: full {full:8.3f} s, one incremental edit {incremental * 1e3:8.3f} ms')
+
+
+if __name__ == '__main__':
+    benchmark_tokenize()
+    benchmark_parse_parallel()
+    benchmark_evaluate()
+    benchmark_vectorized()
+    benchmark_deep_nesting()
+    benchmark_incremental()
@@ -0,0 +1,231 @@
+import math
+
+import numpy as np
+
+from main import (AssignNode, BinaryOpNode, NumberNode, TokenType, UnaryOpNode, VariableNode,
+                  postorder)
+
+# Stack machine opcodes
+PUSH, LOAD, STORE, ADD, SUB, MUL, DIV, NEG, SIN, COS = range(10)
+
+BINARY_OPCODES = {
+    TokenType.PLUS: ADD,
+    TokenType.MINUS: SUB,
+    TokenType.MULTIPLY: MUL,
+    TokenType.DIVIDE: DIV,
+}
+UNARY_OPCODES = {
+    TokenType.MINUS: NEG,
+    TokenType.SIN: SIN,
+    TokenType.COS: COS,
+}
+UNARY_FUNCTIONS = {
+    TokenType.MINUS: '-',
+    TokenType.SIN: 'sin',
+    TokenType.COS: 'cos',
+}
+ARRAY_FUNCTIONS = {
+    TokenType.PLUS: np.add,
+    TokenType.MINUS: np.subtract,
+    TokenType.MULTIPLY: np.multiply,
+    TokenType.DIVIDE: np.divide,
+}
+ARRAY_UNARY_FUNCTIONS = {
+    TokenType.MINUS: np.negative,
+    TokenType.SIN: np.sin,
+    TokenType.COS: np.cos,
+}
+RESULT = ''  # receives the value of an expression statement, no identifier can name it
+
+
+def reference_counts(node):
+    # How many parents point at each node, above one only for subtrees shared in a DAG
+    counts = {}
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        counts[id(node)] = counts.get(id(node), 0) + 1
+        if counts[id(node)] > 1:
+            continue
+        if isinstance(node, BinaryOpNode):
+            stack.extend((node.left, node.right))
+        elif isinstance(node, UnaryOpNode):
+            stack.append(node.expr)
+        elif isinstance(node, AssignNode):
+            stack.append(node.value)
+    return counts
+
+
+class StackProgram:
+    # Flat list of (opcode, argument) pairs run by a loop, nesting depth costs nothing
+    def __init__(self, statements):
+        self.code = []
+        for statement in statements:
+            for node in postorder(statement):
+                if isinstance(node, NumberNode):
+                    self.code.append((PUSH, node.value))
+                elif isinstance(node, VariableNode):
+                    self.code.append((LOAD, node.name))
+                elif isinstance(node, BinaryOpNode):
+                    self.code.append((BINARY_OPCODES[node.op.type], None))
+                elif isinstance(node, UnaryOpNode):
+                    self.code.append((UNARY_OPCODES[node.op.type], None))
+            name = statement.variable.name if isinstance(statement, AssignNode) else RESULT
+            self.code.append((STORE, name))
+
+    def run(self, variables=None):
+        variables = dict(variables or {})
+        stack = []
+        push, pop = stack.append, stack.pop
+        for opcode, argument in self.code:
+            if opcode == PUSH:
+                push(argument)
+            elif opcode == LOAD:
+                if argument not in variables:
+                    raise NameError(f'Undefined variable: {argument}')
+                push(variables[argument])
+            elif opcode == STORE:
+                variables[argument] = pop()
+            elif opcode == ADD:
+                right = pop()
+                stack[-1] = stack[-1] + right
+            elif opcode == SUB:
+                right = pop()
+                stack[-1] = stack[-1] - right
+            elif opcode == MUL:
+                right = pop()
+                stack[-1] = stack[-1] * right
+            elif opcode == DIV:
+                right = pop()
+                stack[-1] = stack[-1] / right
+            elif opcode == NEG:
+                stack[-1] = -stack[-1]
+            elif opcode == SIN:
+                stack[-1] = math.sin(stack[-1])
+            else:
+                stack[-1] = math.cos(stack[-1])
+        return variables
+
+
+class PythonProgram:
+    # The script turned into Python source and compiled once, evaluation is plain bytecode.
+    # Subtrees shared within a statement (see optimizer.py) are computed once into a temporary.
+    def __init__(self, statements):
+        lines = []
+        for statement in statements:
+            values = []
+            counts = reference_counts(statement)
+            temporaries = {}
+            for node in postorder(statement, temporaries):
+                if id(node) in temporaries:
+                    values.append(temporaries[id(node)])
+                    continue
+                if isinstance(node, NumberNode):
+                    values.append(repr(node.value))
+                elif isinstance(node, VariableNode):
+                    values.append(self.mangle(node.name))
+                elif isinstance(node, BinaryOpNode):
+                    right = values.pop()
+                    values.append(f'({values.pop()} {node.op.value} {right})')
+                elif isinstance(node, UnaryOpNode):
+                    values.append(f'{UNARY_FUNCTIONS[node.op.type]}({values.pop()})')
+                if counts[id(node)] > 1 and isinstance(node, (BinaryOpNode, UnaryOpNode)):
+                    temporary = f't_{len(temporaries)}'
+                    lines.append(f'{temporary} = {values.pop()}')
+                    values.append(temporary)
+                    temporaries[id(node)] = temporary
+            name = statement.variable.name if isinstance(statement, AssignNode) else RESULT
+            lines.append(f'{self.mangle(name)} = {values.pop()}')
+        self.source = '\n'.join(lines)
+        self.code = compile(self.source, '<lab6>', 'exec')
+
+    @staticmethod
+    def mangle(name):
+        # Keeps script variables apart from Python keywords and the sin/cos helpers
+        return 'v_' + name
+
+    def run(self, variables=None):
+        namespace = {'sin': math.sin, 'cos': math.cos}
+        for name, value in (variables or {}).items():
+            namespace[self.mangle(name)] = value
+        try:
+            exec(self.code, namespace)
+        except NameError as error:
+            raise NameError(f'Undefined variable: {error.name[2:]}') from None
+        return {name[2:]: value for name, value in namespace.items() if name.startswith('v_')}
+
+
+class ArrayProgram:
+    # Variables bound to NumPy arrays, every node is one ufunc call over the whole batch.
+    # Intermediate results live in one buffer per stack depth, reused by all statements;
+    # division by zero gives inf/nan as in NumPy instead of raising.
+    def __init__(self, statements):
+        self.statements = []  # (variable, [(ufunc, operands, slot)], result operand)
+        self.depth = 0
+        for statement in statements:
+            operands = []  # (is_slot, value): a slot index, a constant or a variable name
+            instructions = []
+            for node in postorder(statement.value if isinstance(statement, AssignNode) else statement):
+                if isinstance(node, NumberNode):
+                    operands.append((False, node.value))
+                elif isinstance(node, VariableNode):
+                    operands.append((False, node.name))
+                else:
+                    if isinstance(node, BinaryOpNode):
+                        ufunc, count = ARRAY_FUNCTIONS[node.op.type], 2
+                    else:
+                        ufunc, count = ARRAY_UNARY_FUNCTIONS[node.op.type], 1
+                    arguments = tuple(operands[-count:])
+                    del operands[-count:]
+                    slot = len(operands)
+                    instructions.append((ufunc, arguments, slot))
+                    operands.append((True, slot))
+                    self.depth = max(self.depth, slot + 1)
+            name = statement.variable.name if isinstance(statement, AssignNode) else RESULT
+            self.statements.append((name, instructions, operands.pop()))
+
+    def run(self, variables=None, dtype=np.float64):
+        variables = dict(variables or {})
+        shape = np.broadcast_shapes(*(np.shape(value) for value in variables.values()))
+        slots = [np.empty(shape, dtype) for _ in range(self.depth)]
+        owned = set()  # variables whose array was allocated here and can be written over
+
+        def load(operand):
+            is_slot, value = operand
+            if is_slot:
+                return slots[value]
+            if not isinstance(value, str):
+                return value
+            if value not in variables:
+                raise NameError(f'Undefined variable: {value}')
+            return variables[value]
+
+        for name, instructions, result in self.statements:
+            # Ufuncs are elementwise, so the old value of name may be read while it is overwritten
+            target = variables[name] if name in owned else np.empty(shape, dtype)
+            for ufunc, arguments, slot in instructions[:-1]:
+                ufunc(*map(load, arguments), out=slots[slot])
+            if instructions:
+                ufunc, arguments, _ = instructions[-1]
+                ufunc(*map(load, arguments), out=target)
+            else:
+                np.copyto(target, load(result))
+            variables[name] = target
+            owned.add(name)
+        return variables
+
+
+def compile_program(statements, backend='python'):
+    # Python bytecode is fastest for single values, 'numpy' evaluates whole arrays of bindings;
+    # very deep expressions fall back to the stack machine
+    statements = list(statements)
+    if backend == 'numpy':
+        return ArrayProgram(statements)
+    if backend == 'python':
+        try:
+            return PythonProgram(statements)
+        except (SyntaxError, RecursionError, MemoryError):
+            pass
+    elif backend != 'stack':
+        raise ValueError(f'Unknown backend: {backend}')
+    return StackProgram(statements)
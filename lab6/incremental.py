@@ -0,0 +1,122 @@
+import numpy as np
+
+from main import Lexer, Parser, Token, TokenType
+
+
+class Line:
+    __slots__ = ('text', 'tokens', 'statement', 'error')
+
+    def __init__(self, text, lexer_class):
+        # Statements never span lines, so every line is lexed and parsed on its own. The line
+        # moves when lines above it are edited, so a lexer error here has the wrong line and
+        # position in its message; Document.raise_error rebuilds it where the line is now.
+        self.text = text
+        self.tokens = None  # stays None when the line does not even lex
+        self.statement = None
+        self.error = None
+        lexer = lexer_class(text)
+        try:
+            self.tokens = lexer.tokenize()[:-1]  # without the EOF
+            statements = Parser(self.tokens + [Token(TokenType.EOF, None)]).parse()
+        except Exception as error:
+            self.error = error
+            return
+        if statements:
+            self.statement = statements[0]
+
+
+class Document:
+    # A script kept lexed and parsed line by line; an edit only redoes the lines it touches
+    def __init__(self, text, lexer_class=Lexer):
+        self.lexer_class = lexer_class
+        self.lines = [Line(line, lexer_class) for line in text.split('\n')]
+        # Offset of every line; a NumPy array so an edit shifts the lines after it in one vector add
+        self.line_starts = self.starts_of(self.lines, 0)
+        self.length = len(text)
+
+    @staticmethod
+    def starts_of(lines, position):
+        lengths = np.fromiter((len(line.text) + 1 for line in lines), dtype=np.int64, count=len(lines))
+        return position + np.cumsum(lengths) - lengths
+
+    def __len__(self):
+        return self.length
+
+    @property
+    def text(self):
+        return '\n'.join(line.text for line in self.lines)
+
+    def edit(self, offset, removed, inserted):
+        # Replaces text[offset:offset + removed] with inserted. Returns (first line, old statements,
+        # new statements) for the lines that changed, with None for blank or broken lines.
+        if offset < 0 or removed < 0 or offset + removed > self.length:
+            raise ValueError(f'Edit ({offset}, {removed}) is outside a text of length {self.length}')
+        first = int(np.searchsorted(self.line_starts, offset, side='right')) - 1
+        last = int(np.searchsorted(self.line_starts, offset + removed, side='right')) - 1
+        start = int(self.line_starts[first])
+        old_lines = self.lines[first:last + 1]
+        old_text = '\n'.join(line.text for line in old_lines)
+        new_texts = (old_text[:offset - start] + inserted + old_text[offset + removed - start:]).split('\n')
+
+        # Lines the edit leaves as they were at either end keep their tokens and AST nodes
+        prefix = 0
+        while (prefix < min(len(old_lines), len(new_texts))
+               and old_lines[prefix].text == new_texts[prefix]):
+            prefix += 1
+        suffix = 0
+        while (suffix < min(len(old_lines), len(new_texts)) - prefix
+               and old_lines[-1 - suffix].text == new_texts[-1 - suffix]):
+            suffix += 1
+        low, high = first + prefix, last + 1 - suffix
+        new_lines = [Line(text, self.lexer_class) for text in new_texts[prefix:len(new_texts) - suffix]]
+
+        delta = len(inserted) - removed
+        position = self.line_starts[low] if low < len(self.line_starts) else self.length + 1
+        starts = self.starts_of(new_lines, position)
+        if len(new_lines) == high - low:
+            self.line_starts[low:high] = starts
+            self.line_starts[high:] += delta
+        else:
+            self.line_starts = np.concatenate((self.line_starts[:low], starts, self.line_starts[high:] + delta))
+
+        old_statements = [line.statement for line in self.lines[low:high]]
+        self.lines[low:high] = new_lines
+        self.length += delta
+        return low + 1, old_statements, [line.statement for line in new_lines]
+
+    def raise_error(self, number):
+        # Raises the error of line number (from 0) as parse_file on the whole text would report it
+        line = self.lines[number]
+        if line.tokens is None:
+            lexer = self.lexer_class(line.text)
+            lexer.line_number = number + 1
+            lexer.offset = int(self.line_starts[number])
+            lexer.tokenize()
+        elif number < len(self.lines) - 1:
+            # The line was parsed followed by EOF, in the whole text an EOL comes first
+            Parser(line.tokens + [Token(TokenType.EOL, '\n'), Token(TokenType.EOF, None)]).parse()
+        raise line.error
+
+    def tokens(self):
+        # The same stream Lexer(text).tokens() would give, rebuilt from the cached lines
+        for number, line in enumerate(self.lines):
+            if line.tokens is None:
+                self.raise_error(number)
+            yield from line.tokens
+            if number < len(self.lines) - 1:
+                yield Token(TokenType.EOL, '\n')
+        yield Token(TokenType.EOF, None)
+
+    def parse(self):
+        # Whole AST as parse_file returns it. The first broken line raises its error, unless a
+        # later line does not lex: parse_file lexes everything before it parses.
+        statements = []
+        for number, line in enumerate(self.lines):
+            if line.error is not None:
+                for later in range(number, len(self.lines)):
+                    if self.lines[later].tokens is None:
+                        self.raise_error(later)
+                self.raise_error(number)
+            if line.statement is not None:
+                statements.append(line.statement)
+        return statements
@@ -0,0 +1,274 @@
+from array import array
+import string
+
+ESCAPES = {
+    'd': frozenset(string.digits),
+    'w': frozenset(string.ascii_letters + string.digits + '_'),
+    's': frozenset(' \t\n\r\f\v'),
+    'n': frozenset('\n'),
+    't': frozenset('\t'),
+    'r': frozenset('\r'),
+}
+
+
+class CharClasses(dict):
+    # str.translate mapping, characters that no pattern uses fall into class 0
+    def __missing__(self, key):
+        return 0
+
+
+class RegexParser:
+    # Parses the regex subset used by token specs into a Thompson NFA fragment
+    def __init__(self, pattern, nfa):
+        self.pattern = pattern
+        self.pos = 0
+        self.nfa = nfa
+
+    def error(self, message):
+        raise ValueError(f'{message} at position {self.pos} in pattern {self.pattern!r}')
+
+    def peek(self):
+        return self.pattern[self.pos] if self.pos < len(self.pattern) else None
+
+    def parse(self):
+        fragment = self.alternation()
+        if self.pos != len(self.pattern):
+            self.error('Unexpected character')
+        return fragment
+
+    def alternation(self):
+        fragments = [self.concatenation()]
+        while self.peek() == '|':
+            self.pos += 1
+            fragments.append(self.concatenation())
+        if len(fragments) == 1:
+            return fragments[0]
+        start, end = self.nfa.new_state(), self.nfa.new_state()
+        for fragment_start, fragment_end in fragments:
+            self.nfa.add_epsilon(start, fragment_start)
+            self.nfa.add_epsilon(fragment_end, end)
+        return start, end
+
+    def concatenation(self):
+        start = end = self.nfa.new_state()
+        while self.peek() not in (None, '|', ')'):
+            fragment_start, fragment_end = self.repetition()
+            self.nfa.add_epsilon(end, fragment_start)
+            end = fragment_end
+        return start, end
+
+    def repetition(self):
+        start, end = self.atom()
+        while self.peek() in ('*', '+', '?'):
+            operator = self.pattern[self.pos]
+            self.pos += 1
+            new_start, new_end = self.nfa.new_state(), self.nfa.new_state()
+            self.nfa.add_epsilon(new_start, start)
+            self.nfa.add_epsilon(end, new_end)
+            if operator in '*?':
+                self.nfa.add_epsilon(new_start, new_end)
+            if operator in '*+':
+                self.nfa.add_epsilon(end, start)
+            start, end = new_start, new_end
+        return start, end
+
+    def atom(self):
+        char = self.peek()
+        if char == '(':
+            self.pos += 1
+            fragment = self.alternation()
+            if self.peek() != ')':
+                self.error("Expected ')'")
+            self.pos += 1
+            return fragment
+        if char == '[':
+            return self.nfa.char_fragment(self.char_class())
+        if char == '\\':
+            self.pos += 1
+            escaped = self.peek()
+            if escaped is None:
+                self.error('Dangling escape')
+            self.pos += 1
+            if escaped == 'b':
+                # Word boundary: longest match already keeps keywords from eating identifier prefixes
+                state = self.nfa.new_state()
+                return state, state
+            return self.nfa.char_fragment(ESCAPES.get(escaped, frozenset(escaped)))
+        if char in ('*', '+', '?', '^', '$', '.', '{'):
+            self.error(f'Unsupported {char!r}')
+        self.pos += 1
+        return self.nfa.char_fragment(frozenset(char))
+
+    def char_class(self):
+        self.pos += 1  # '['
+        if self.peek() == '^':
+            self.error('Negated classes are not supported')
+        chars = set()
+        while self.peek() != ']':
+            char = self.peek()
+            if char is None:
+                self.error("Expected ']'")
+            self.pos += 1
+            if char == '\\':
+                escaped = self.pattern[self.pos]
+                self.pos += 1
+                chars |= ESCAPES.get(escaped, {escaped})
+                continue
+            if self.peek() == '-' and self.pos + 1 < len(self.pattern) and self.pattern[self.pos + 1] != ']':
+                last = self.pattern[self.pos + 1]
+                self.pos += 2
+                chars |= {chr(code) for code in range(ord(char), ord(last) + 1)}
+            else:
+                chars.add(char)
+        self.pos += 1  # ']'
+        return frozenset(chars)
+
+
+class NFA:
+    def __init__(self):
+        self.epsilon = []
+        self.edges = []  # (set of characters, target) per state
+        self.accepting = {}  # NFA state -> index of the token pattern
+
+    def new_state(self):
+        self.epsilon.append([])
+        self.edges.append([])
+        return len(self.epsilon) - 1
+
+    def add_epsilon(self, source, target):
+        self.epsilon[source].append(target)
+
+    def char_fragment(self, chars):
+        start, end = self.new_state(), self.new_state()
+        self.edges[start].append((chars, end))
+        return start, end
+
+    def closure(self, states):
+        stack = list(states)
+        closed = set(states)
+        while stack:
+            for target in self.epsilon[stack.pop()]:
+                if target not in closed:
+                    closed.add(target)
+                    stack.append(target)
+        return frozenset(closed)
+
+
+class LexerTable:
+    # Minimal DFA for a whole token spec, rows indexed by character class
+    def __init__(self, token_patterns):
+        self.token_types = [token_type for _, token_type in token_patterns]
+
+        nfa = NFA()
+        start = nfa.new_state()
+        for priority, (pattern, _) in enumerate(token_patterns):
+            fragment_start, fragment_end = RegexParser(pattern, nfa).parse()
+            nfa.add_epsilon(start, fragment_start)
+            nfa.accepting[fragment_end] = priority
+
+        self.build_char_classes(nfa)
+        rows, labels = self.determinize(nfa, start)
+        self.minimize(rows, labels)
+
+    def build_char_classes(self, nfa):
+        # Characters that belong to exactly the same sets can share one column
+        char_sets = sorted({chars for edges in nfa.edges for chars, _ in edges}, key=sorted)
+        signatures = {}
+        for char in sorted(set().union(*char_sets)):
+            signature = tuple(char in chars for chars in char_sets)
+            signatures.setdefault(signature, []).append(char)
+
+        self.num_classes = len(signatures) + 1
+        self.char_classes = CharClasses()
+        self.class_chars = [frozenset()]
+        for symbol_class, chars in enumerate(signatures.values(), start=1):
+            for char in chars:
+                self.char_classes[ord(char)] = symbol_class
+            self.class_chars.append(frozenset(chars))
+
+    def determinize(self, nfa, start):
+        # Subset construction; the empty subset is the dead state 0
+        representatives = [None] + [next(iter(chars)) for chars in self.class_chars[1:]]
+        start_subset = nfa.closure([start])
+        index = {frozenset(): 0, start_subset: 1}
+        subsets = [frozenset(), start_subset]
+        rows = [[0] * self.num_classes]
+        labels = [None]
+        position = 1
+        while position < len(subsets):
+            subset = subsets[position]
+            row = [0]
+            for char in representatives[1:]:
+                targets = [target for state in subset for chars, target in nfa.edges[state] if char in chars]
+                target_subset = nfa.closure(targets) if targets else frozenset()
+                if target_subset not in index:
+                    index[target_subset] = len(subsets)
+                    subsets.append(target_subset)
+                row.append(index[target_subset])
+            rows.append(row)
+            # Priority rule: the earliest pattern wins when several accept the same lexeme
+            priorities = [nfa.accepting[state] for state in subset if state in nfa.accepting]
+            labels.append(min(priorities) if priorities else None)
+            position += 1
+        return rows, labels
+
+    def minimize(self, rows, labels):
+        # Moore refinement, states start out grouped by the token they accept
+        initial = {}
+        block_of = [initial.setdefault(label, len(initial)) for label in labels]
+        while True:
+            signatures = {}
+            refined = [
+                signatures.setdefault((block_of[state],) + tuple(block_of[target] for target in row), len(signatures))
+                for state, row in enumerate(rows)
+            ]
+            if len(signatures) == len(set(block_of)):
+                break
+            block_of = refined
+
+        # Dead state stays 0 and the start state becomes 1
+        number = {block_of[0]: 0, block_of[1]: 1}
+        for state in range(len(rows)):
+            number.setdefault(block_of[state], len(number))
+
+        self.num_states = len(number)
+        self.start = 1
+        typecode = 'H' if self.num_states < 1 << 16 else 'I'
+        self.table = array(typecode, bytes(array(typecode).itemsize * self.num_states * self.num_classes))
+        self.accept = array('h', [-1]) * self.num_states  # pattern index, -1 when not accepting
+        for state, row in enumerate(rows):
+            new_state = number[block_of[state]]
+            offset = new_state * self.num_classes
+            for symbol_class, target in enumerate(row):
+                self.table[offset + symbol_class] = number[block_of[target]]
+            if labels[state] is not None:
+                self.accept[new_state] = labels[state]
+
+    def classify(self, text):
+        classes = text.translate(self.char_classes)
+        if self.num_classes < 256:
+            return classes.encode('latin-1')
+        return [ord(char) for char in classes]
+
+    def scan(self, text):
+        # Longest match: yields (pattern index, start, end) for every lexeme, skipped ones included
+        classes = self.classify(text)
+        table, k, accept = self.table, self.num_classes, self.accept
+        position, length = 0, len(text)
+        while position < length:
+            state = self.start
+            last_end = -1
+            last_pattern = -1
+            i = position
+            while i < length:
+                state = table[state * k + classes[i]]
+                if not state:
+                    break
+                i += 1
+                if accept[state] >= 0:
+                    last_end = i
+                    last_pattern = accept[state]
+            if last_end < 0:
+                raise ValueError(f'No token matches at position {position}')
+            yield last_pattern, position, last_end
+            position = last_end
@@ -1,5 +1,10 @@
 import os
 import re
+from array import array
+from bisect import bisect_right
+from collections import deque
+
+from lexgen import LexerTable
 
 class TokenType:
     ASSIGN = 'ASSIGN'
@@ -20,6 +25,8 @@ class TokenType:
 
 
 class Token:
+    __slots__ = ('type', 'value')
+    
     def __init__(self, type, value):
         self.type = type
         self.value = value
@@ -28,6 +35,17 @@ class Token:
         return f'Token({self.type}, {self.value})'
 
 
+def token_value(token_type, text, start, end):
+    # Value of a token, read straight from its span in the source
+    if token_type == TokenType.INTEGER:
+        return int(text[start:end])
+    if token_type == TokenType.FLOAT:
+        return float(text[start:end])
+    if token_type == TokenType.EOF:
+        return None
+    return text[start:end]
+
+
 class Lexer:
     token_patterns = [
         (r'[ \t]+', None),  # skip whitespace but not newlines
@@ -41,100 +59,253 @@ class Lexer:
         (r'/', TokenType.DIVIDE),
         (r'sin\b', TokenType.SIN),  # \b ensures it's a word boundary
         (r'cos\b', TokenType.COS),
-        (r'-?\d+\.\d+', TokenType.FLOAT),  # floating point numbers
-        (r'-?\d+', TokenType.INTEGER),  # integers
+        (r'\d+\.\d+', TokenType.FLOAT),  # floating point numbers, the sign is a MINUS token
+        (r'\d+', TokenType.INTEGER),  # integers
         (r'[a-zA-Z_][a-zA-Z0-9_]*', TokenType.IDENTIFIER),  # identifiers
     ]
     
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.build_master_pattern()
+
+    @classmethod
+    def build_master_pattern(cls):
+        # One alternation with a group per pattern, compiled once per class
+        # Alternatives are tried left to right, so the order of token_patterns still decides
+        groups = []
+        for pattern, token_type in cls.token_patterns:
+            groups.append(f'(?P<{token_type or "SKIP"}>{pattern})')
+        cls.master_pattern = re.compile('|'.join(groups))
+        cls.group_types = [None] + [token_type for _, token_type in cls.token_patterns]
+
     def __init__(self, text):
         self.text = text
         self.pos = 0
         self.current_char = self.text[self.pos] if text else None
         self.line_number = 1
+        self.offset = 0  # where text starts in the whole source, for positions in error messages
     
     def tokenize(self):
-        tokens = []
+        return list(self.tokens())
+    
+    def tokens(self):
+        # Tokens are produced one at a time, ending with EOF
+        text = self.text
+        for token_type, start, end in self.spans():
+            yield Token(token_type, token_value(token_type, text, start, end))
+        yield Token(TokenType.EOF, None)
+    
+    def spans(self):
+        # (token type, start, end) of every token that is not skipped, without the final EOF
         position = 0
+        group_types = self.group_types
         
-        while position < len(self.text):
-            match = None
-            
-            for pattern, token_type in self.token_patterns:
-                regex = re.compile(pattern)
-                match = regex.match(self.text, position)
-                
-                if match:
-                    value = match.group(0)
-                    if token_type:
-                        if token_type == TokenType.INTEGER:
-                            tokens.append(Token(token_type, int(value)))
-                        elif token_type == TokenType.FLOAT:
-                            tokens.append(Token(token_type, float(value)))
-                        elif token_type == TokenType.EOL:
-                            tokens.append(Token(token_type, value))
-                            self.line_number += 1
-                        else:
-                            tokens.append(Token(token_type, value))
-                    
-                    position = match.end()
-                    break
-            
-            if not match:
-                raise Exception(f'Invalid token at position {position}, line {self.line_number}')
+        for match in iter(self.master_pattern.scanner(self.text).match, None):
+            position = match.end()
+            token_type = group_types[match.lastindex]
+            if token_type is None:
+                continue
+            if token_type == TokenType.EOL:
+                self.line_number += 1
+            yield token_type, match.start(), position
+        
+        if position < len(self.text):
+            raise Exception(f'Invalid token at position {self.offset + position}, line {self.line_number}')
+
+
+Lexer.build_master_pattern()
+
+
+class DFALexer(Lexer):
+    # Same token spec, scanned by a generated minimal DFA with longest match and pattern priority
+    @classmethod
+    def build_master_pattern(cls):
+        super().build_master_pattern()
+        cls.table = LexerTable(cls.token_patterns)
+
+    def spans(self):
+        token_types = self.table.token_types
+        position = 0
         
-        tokens.append(Token(TokenType.EOF, None))
-        return tokens
+        try:
+            for pattern_index, start, end in self.table.scan(self.text):
+                position = end
+                token_type = token_types[pattern_index]
+                if token_type is None:
+                    continue
+                if token_type == TokenType.EOL:
+                    self.line_number += 1
+                yield token_type, start, end
+        except ValueError:
+            raise Exception(f'Invalid token at position {self.offset + position}, line {self.line_number}')
+
+
+TOKEN_TYPES = [
+    TokenType.ASSIGN, TokenType.INTEGER, TokenType.FLOAT, TokenType.IDENTIFIER, TokenType.EOF,
+    TokenType.EOL, TokenType.PLUS, TokenType.MINUS, TokenType.MULTIPLY, TokenType.DIVIDE,
+    TokenType.SIN, TokenType.COS, TokenType.LPAREN, TokenType.RPAREN,
+]
+TOKEN_CODES = {token_type: code for code, token_type in enumerate(TOKEN_TYPES)}
+
+
+class TokenBuffer:
+    # Struct of arrays: a type byte and two source offsets per token, values are decoded on access
+    def __init__(self, text):
+        self.text = text
+        self.types = array('B')
+        self.starts = array('I')
+        self.ends = array('I')
+        self.line_starts = array('I', [0])  # offset of the first character of every line
+    
+    @classmethod
+    def from_lexer(cls, lexer):
+        buffer = cls(lexer.text)
+        types, starts, ends = buffer.types, buffer.starts, buffer.ends
+        for token_type, start, end in lexer.spans():
+            types.append(TOKEN_CODES[token_type])
+            starts.append(start)
+            ends.append(end)
+            if token_type == TokenType.EOL:
+                buffer.line_starts.append(end)
+        types.append(TOKEN_CODES[TokenType.EOF])
+        starts.append(len(lexer.text))
+        ends.append(len(lexer.text))
+        return buffer
+    
+    @classmethod
+    def concatenate(cls, buffers):
+        # Joins buffers of consecutive pieces of one source, each piece ending at a line boundary
+        merged = cls(''.join(buffer.text for buffer in buffers))
+        offset = 0
+        for number, buffer in enumerate(buffers):
+            count = len(buffer) - (number < len(buffers) - 1)  # only the last EOF is kept
+            merged.types.extend(buffer.types[:count])
+            merged.starts.extend(array('I', map(offset.__add__, buffer.starts[:count])))
+            merged.ends.extend(array('I', map(offset.__add__, buffer.ends[:count])))
+            merged.line_starts.extend(array('I', map(offset.__add__, buffer.line_starts[1:])))
+            offset += len(buffer.text)
+        return merged
+    
+    def __len__(self):
+        return len(self.types)
+    
+    def type(self, index):
+        return TOKEN_TYPES[self.types[index]]
+    
+    def value(self, index):
+        return token_value(self.type(index), self.text, self.starts[index], self.ends[index])
+    
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        return Token(self.type(index), self.value(index))
+    
+    def __iter__(self):
+        # Token objects only exist while somebody holds on to them
+        for index in range(len(self.types)):
+            yield self[index]
+    
+    def span(self, index):
+        # (line, column, end column), both counted from 1, found by bisecting the line starts
+        start = self.starts[index]
+        line = bisect_right(self.line_starts, start)
+        line_start = self.line_starts[line - 1]
+        return line, start - line_start + 1, self.ends[index] - line_start + 1
 
 
 class ASTNode:
-    pass
+    def __repr__(self):
+        return format_ast(self)
 
 class BinaryOpNode(ASTNode):
     def __init__(self, left, op, right):
         self.left = left
         self.op = op
         self.right = right
-    
-    def __repr__(self):
-        return f'({self.left} {self.op.value} {self.right})'
 
 class UnaryOpNode(ASTNode):
     def __init__(self, op, expr):
         self.op = op
         self.expr = expr
-    
-    def __repr__(self):
-        return f'{self.op.value}({self.expr})'
 
 class NumberNode(ASTNode):
     def __init__(self, token):
         self.token = token
         self.value = token.value
-    
-    def __repr__(self):
-        return str(self.value)
 
 class VariableNode(ASTNode):
     def __init__(self, token):
         self.token = token
         self.name = token.value
-    
-    def __repr__(self):
-        return self.name
 
 class AssignNode(ASTNode):
     def __init__(self, variable, value):
         self.variable = variable
         self.value = value
-    
-    def __repr__(self):
-        return f'{self.variable} = {self.value}'
+
+
+def postorder(node, done=()):
+    # Children before parents, walked with an explicit stack instead of recursion;
+    # nodes whose id is in done are yielded without visiting their children again
+    stack = [(node, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if expanded or isinstance(node, (NumberNode, VariableNode)) or id(node) in done:
+            yield node
+            continue
+        stack.append((node, True))
+        if isinstance(node, BinaryOpNode):
+            stack.append((node.right, False))
+            stack.append((node.left, False))
+        elif isinstance(node, UnaryOpNode):
+            stack.append((node.expr, False))
+        elif isinstance(node, AssignNode):
+            stack.append((node.value, False))
+        else:
+            raise Exception(f'Unknown node type: {type(node)}')
+
+def format_ast(node):
+    # Source-like text of a node, written piece by piece from an explicit stack so deep
+    # nesting neither recurses nor copies the inner text once per level
+    parts = []
+    stack = [node]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            parts.append(item)
+        elif isinstance(item, BinaryOpNode):
+            stack.extend((')', item.right, f' {item.op.value} ', item.left, '('))
+        elif isinstance(item, UnaryOpNode):
+            stack.extend((')', item.expr, f'{item.op.value}('))
+        elif isinstance(item, NumberNode):
+            parts.append(str(item.value))
+        elif isinstance(item, VariableNode):
+            parts.append(item.name)
+        elif isinstance(item, AssignNode):
+            stack.extend((item.value, f'{item.variable.name} = '))
+        else:
+            raise Exception(f'Unknown node type: {type(item)}')
+    return ''.join(parts)
+
+
+# Binding power of the binary operators, all of them associate to the left
+PRECEDENCE = {
+    TokenType.PLUS: 1,
+    TokenType.MINUS: 1,
+    TokenType.MULTIPLY: 2,
+    TokenType.DIVIDE: 2,
+}
+# Kinds of entries on the operator stack of Parser.expr
+BINARY, NEGATE, GROUP, CALL = range(4)
+
 
 class Parser:
     def __init__(self, tokens):
-        self.tokens = tokens
+        # Any iterable of tokens works, a generator is consumed only as far as the parser has read
+        self.token_stream = iter(tokens)
+        self.lookahead = deque()  # tokens already pulled from the stream but not reached yet
         self.pos = 0
-        self.current_token = self.tokens[self.pos]
+        self.current_token = next(self.token_stream)
     
     def error(self, expected=None):
         token = self.current_token
@@ -143,10 +314,21 @@ class Parser:
             msg += f', expected: {expected}'
         raise Exception(msg)
     
+    def peek(self, k=1):
+        # k-th token after the current one, the stream repeats its last token (EOF) when exhausted
+        while len(self.lookahead) < k:
+            token = next(self.token_stream, None)
+            if token is None:
+                return self.lookahead[-1] if self.lookahead else self.current_token
+            self.lookahead.append(token)
+        return self.lookahead[k - 1]
+    
     def advance(self):
         self.pos += 1
-        if self.pos < len(self.tokens):
-            self.current_token = self.tokens[self.pos]
+        if self.lookahead:
+            self.current_token = self.lookahead.popleft()
+        else:
+            self.current_token = next(self.token_stream, self.current_token)
         return self.current_token
     
     def eat(self, token_type):
@@ -158,25 +340,24 @@ class Parser:
             self.error(token_type)
     
     def parse(self):
-        statements = []
-        
+        return list(self.statements())
+    
+    def statements(self):
+        # Yields every statement as soon as it has been parsed
         while self.current_token.type != TokenType.EOF:
             if self.current_token.type == TokenType.EOL:
                 self.advance()  # Skip EOL tokens
                 continue
                 
-            statements.append(self.statement())
+            yield self.statement()
                 
             # Expect EOL or EOF after each statement
             if self.current_token.type not in (TokenType.EOL, TokenType.EOF):
                 self.error('EOL or EOF')
-        
-        return statements
     
     def statement(self):
         if (self.current_token.type == TokenType.IDENTIFIER and 
-            self.pos + 1 < len(self.tokens) and 
-            self.tokens[self.pos + 1].type == TokenType.ASSIGN):
+            self.peek().type == TokenType.ASSIGN):
             return self.assignment()
         else:
             return self.expr()
@@ -189,67 +370,74 @@ class Parser:
         return AssignNode(variable, value)
     
     def expr(self):
-        node = self.term()
-        
-        while self.current_token.type in (TokenType.PLUS, TokenType.MINUS):
-            op = self.current_token
-            if op.type == TokenType.PLUS:
-                self.eat(TokenType.PLUS)
-            else:
-                self.eat(TokenType.MINUS)
-            
-            node = BinaryOpNode(node, op, self.term())
-        
-        return node
-    
-    def term(self):
-        node = self.factor()
-        
-        while self.current_token.type in (TokenType.MULTIPLY, TokenType.DIVIDE):
-            op = self.current_token
-            if op.type == TokenType.MULTIPLY:
-                self.eat(TokenType.MULTIPLY)
+        # Shunting-yard over explicit operand and operator stacks, so neither deep parentheses
+        # nor long chains of unary minus recurse. Same grammar as before:
+        #   expr: term (('+' | '-') term)*      term: factor (('*' | '/') factor)*
+        #   factor: number | identifier | '(' expr ')' | ('sin' | 'cos') '(' expr ')' | '-' factor
+        operands = []
+        operators = []  # (kind, token)
+        open_groups = 0
+        while True:
+            # Prefix part of a factor
+            token = self.current_token
+            while token.type in (TokenType.MINUS, TokenType.LPAREN, TokenType.SIN, TokenType.COS):
+                if token.type == TokenType.MINUS:
+                    self.advance()
+                    operators.append((NEGATE, Token(TokenType.MINUS, '-')))
+                elif token.type == TokenType.LPAREN:
+                    self.advance()
+                    operators.append((GROUP, token))
+                else:
+                    self.advance()
+                    self.eat(TokenType.LPAREN)
+                    operators.append((CALL, token))
+                open_groups += token.type != TokenType.MINUS
+                token = self.current_token
+
+            if token.type in (TokenType.INTEGER, TokenType.FLOAT):
+                operands.append(NumberNode(token))
+            elif token.type == TokenType.IDENTIFIER:
+                operands.append(VariableNode(token))
             else:
-                self.eat(TokenType.DIVIDE)
-            
-            node = BinaryOpNode(node, op, self.factor())
-        
-        return node
-    
-    def factor(self):
-        token = self.current_token
-        
-        if token.type in (TokenType.INTEGER, TokenType.FLOAT):
+                self.error()
             self.advance()
-            return NumberNode(token)
-        elif token.type == TokenType.LPAREN:
-            self.eat(TokenType.LPAREN)
-            node = self.expr()
-            self.eat(TokenType.RPAREN)
-            return node
-        elif token.type == TokenType.IDENTIFIER:
+            self.reduce_negations(operands, operators)
+
+            # Closing parentheses end factors too, a ')' without an open group is left to the caller
+            while open_groups and self.current_token.type == TokenType.RPAREN:
+                self.reduce_binary(operands, operators, 0)
+                kind, token = operators.pop()
+                if kind == CALL:
+                    operands.append(UnaryOpNode(token, operands.pop()))
+                open_groups -= 1
+                self.advance()
+                self.reduce_negations(operands, operators)
+
+            op = self.current_token
+            if op.type not in PRECEDENCE:
+                break
+            self.reduce_binary(operands, operators, PRECEDENCE[op.type])
+            operators.append((BINARY, op))
             self.advance()
-            return VariableNode(token)
-        elif token.type in (TokenType.SIN, TokenType.COS):
-            return self.function_call()
-        elif token.type == TokenType.MINUS:
-            self.eat(TokenType.MINUS)
-            return UnaryOpNode(Token(TokenType.MINUS, '-'), self.factor())
-        else:
-            self.error()
+
+        self.reduce_binary(operands, operators, 0)
+        if open_groups:
+            self.error(TokenType.RPAREN)
+        return operands.pop()
     
-    def function_call(self):
-        token = self.current_token
-        if token.type == TokenType.SIN:
-            self.eat(TokenType.SIN)
-        else:
-            self.eat(TokenType.COS)
-        
-        self.eat(TokenType.LPAREN)
-        expr = self.expr()
-        self.eat(TokenType.RPAREN)
-        
-        return UnaryOpNode(token, expr)
+    @staticmethod
+    def reduce_negations(operands, operators):
+        # Unary minus applies to a single factor, so it is resolved as soon as that factor ends
+        while operators and operators[-1][0] == NEGATE:
+            operands.append(UnaryOpNode(operators.pop()[1], operands.pop()))
+    
+    @staticmethod
+    def reduce_binary(operands, operators, precedence):
+        # Pops binary operators binding at least as tightly as precedence, down to the nearest group
+        while operators and operators[-1][0] == BINARY and PRECEDENCE[operators[-1][1].type] >= precedence:
+            op = operators.pop()[1]
+            right = operands.pop()
+            operands.append(BinaryOpNode(operands.pop(), op, right))
 
 def parse_file(file_path):
     abs_file_path = os.path.abspath(file_path)
@@ -258,41 +446,73 @@ def parse_file(file_path):
     with open(abs_file_path, 'r') as file:
         content = file.read()
         lexer = Lexer(content)
-        tokens = lexer.tokenize()
+        tokens = TokenBuffer.from_lexer(lexer)
         parser = Parser(tokens)
         ast = parser.parse()
         return tokens, ast
 
+def stream_tokens(file, lexer_class=Lexer):
+    # Lexes a text file line by line, so only the current line is held in memory
+    line_number = 1
+    offset = 0
+    for line in file:
+        lexer = lexer_class(line)
+        lexer.line_number = line_number
+        lexer.offset = offset
+        for token in lexer.tokens():
+            if token.type == TokenType.EOF:
+                break
+            yield token
+        line_number += 1
+        offset += len(line)
+    yield Token(TokenType.EOF, None)
+
+def parse_stream(file_path):
+    # Statements of a file one by one, tokens are never collected into a list
+    abs_file_path = os.path.abspath(file_path)
+    if not os.path.exists(abs_file_path):
+        raise FileNotFoundError(f"File not found: {abs_file_path}")
+    with open(abs_file_path, 'r') as file:
+        yield from Parser(stream_tokens(file)).statements()
+
 def print_ast(node, indent=0):
-    indent_str = '  ' * indent
-    
-    if isinstance(node, list):
-        for item in node:
-            print_ast(item, indent)
-    elif isinstance(node, BinaryOpNode):
-        print(f"{indent_str}BinaryOp:")
-        print(f"{indent_str}  Operator: {node.op.value}")
-        print(f"{indent_str}  Left:")
-        print_ast(node.left, indent + 2)
-        print(f"{indent_str}  Right:")
-        print_ast(node.right, indent + 2)
-    elif isinstance(node, UnaryOpNode):
-        print(f"{indent_str}UnaryOp:")
-        print(f"{indent_str}  Operator: {node.op.value}")
-        print(f"{indent_str}  Expr:")
-        print_ast(node.expr, indent + 2)
-    elif isinstance(node, NumberNode):
-        print(f"{indent_str}Number: {node.value}")
-    elif isinstance(node, VariableNode):
-        print(f"{indent_str}Variable: {node.name}")
-    elif isinstance(node, AssignNode):
-        print(f"{indent_str}Assignment:")
-        print(f"{indent_str}  Variable:")
-        print_ast(node.variable, indent + 2)
-        print(f"{indent_str}  Value:")
-        print_ast(node.value, indent + 2)
-    else:
-        print(f"{indent_str}Unknown node type: {type(node)}")
+    # Pending nodes and lines on an explicit stack, printed in the order a recursive walk would
+    stack = [(node, indent)]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            print(item)
+            continue
+        node, indent = item
+        indent_str = '  ' * indent
+        
+        if isinstance(node, list):
+            pending = [(child, indent) for child in node]
+        elif isinstance(node, BinaryOpNode):
+            pending = [f"{indent_str}BinaryOp:",
+                       f"{indent_str}  Operator: {node.op.value}",
+                       f"{indent_str}  Left:",
+                       (node.left, indent + 2),
+                       f"{indent_str}  Right:",
+                       (node.right, indent + 2)]
+        elif isinstance(node, UnaryOpNode):
+            pending = [f"{indent_str}UnaryOp:",
+                       f"{indent_str}  Operator: {node.op.value}",
+                       f"{indent_str}  Expr:",
+                       (node.expr, indent + 2)]
+        elif isinstance(node, NumberNode):
+            pending = [f"{indent_str}Number: {node.value}"]
+        elif isinstance(node, VariableNode):
+            pending = [f"{indent_str}Variable: {node.name}"]
+        elif isinstance(node, AssignNode):
+            pending = [f"{indent_str}Assignment:",
+                       f"{indent_str}  Variable:",
+                       (node.variable, indent + 2),
+                       f"{indent_str}  Value:",
+                       (node.value, indent + 2)]
+        else:
+            pending = [f"{indent_str}Unknown node type: {type(node)}"]
+        stack.extend(reversed(pending))
 
 
 if __name__ == '__main__':
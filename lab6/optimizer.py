@@ -0,0 +1,119 @@
+import math
+
+from evaluator import RESULT
+from main import (AssignNode, BinaryOpNode, NumberNode, Token, TokenType, UnaryOpNode,
+                  VariableNode, postorder)
+
+FOLDERS = {
+    TokenType.PLUS: lambda left, right: left + right,
+    TokenType.MINUS: lambda left, right: left - right,
+    TokenType.MULTIPLY: lambda left, right: left * right,
+    TokenType.DIVIDE: lambda left, right: left / right,
+    TokenType.SIN: math.sin,
+    TokenType.COS: math.cos,
+}
+
+
+class Optimizer:
+    # Constant folding, propagation of constant variables and hash-consing of equal subtrees
+    def __init__(self):
+        self.nodes = {}  # structural key -> the one shared node for it
+        self.known = {}  # variable -> value, for variables last assigned a constant
+
+    def number(self, value):
+        key = ('number', repr(value))  # keeps 1 and 1.0 apart, as well as 0.0 and -0.0
+        if key not in self.nodes:
+            token_type = TokenType.FLOAT if isinstance(value, float) else TokenType.INTEGER
+            self.nodes[key] = NumberNode(Token(token_type, value))
+        return self.nodes[key]
+
+    def fold(self, op, *values):
+        # None when the result can't be written back as a literal, the error then happens at runtime
+        try:
+            result = FOLDERS[op.type](*values)
+        except (ZeroDivisionError, OverflowError, ValueError):
+            return None
+        if isinstance(result, float) and not math.isfinite(result):
+            return None
+        return self.number(result)
+
+    def rewrite(self, node, children):
+        if isinstance(node, NumberNode):
+            return self.number(node.value)
+        if isinstance(node, VariableNode):
+            if node.name in self.known:
+                return self.number(self.known[node.name])
+            key = ('variable', node.name)
+            return self.nodes.setdefault(key, node)
+        if isinstance(node, UnaryOpNode):
+            (expr,) = children
+            if isinstance(expr, NumberNode):
+                if node.op.type == TokenType.MINUS:
+                    return self.number(-expr.value)
+                folded = self.fold(node.op, expr.value)
+                if folded is not None:
+                    return folded
+            key = ('unary', node.op.type, id(expr))
+            if key not in self.nodes:
+                self.nodes[key] = UnaryOpNode(node.op, expr)
+            return self.nodes[key]
+        left, right = children
+        if isinstance(left, NumberNode) and isinstance(right, NumberNode):
+            folded = self.fold(node.op, left.value, right.value)
+            if folded is not None:
+                return folded
+        key = ('binary', node.op.type, id(left), id(right))
+        if key not in self.nodes:
+            self.nodes[key] = BinaryOpNode(left, node.op, right)
+        return self.nodes[key]
+
+    def expression(self, node):
+        # Rebuilds an expression bottom up without recursion
+        results = []
+        for current in postorder(node):
+            if isinstance(current, BinaryOpNode):
+                right = results.pop()
+                children = (results.pop(), right)
+            elif isinstance(current, UnaryOpNode):
+                children = (results.pop(),)
+            else:
+                children = ()
+            results.append(self.rewrite(current, children))
+        return results.pop()
+
+    def statement(self, statement):
+        if isinstance(statement, AssignNode):
+            name, value = statement.variable.name, self.expression(statement.value)
+            optimized = AssignNode(statement.variable, value)
+        else:
+            # An expression statement assigns its value to RESULT
+            name, value = RESULT, self.expression(statement)
+            optimized = value
+        if isinstance(value, NumberNode):
+            self.known[name] = value.value
+        else:
+            self.known.pop(name, None)  # reassigned to something that is not constant
+        return optimized
+
+
+def optimize(statements):
+    optimizer = Optimizer()
+    return [optimizer.statement(statement) for statement in statements]
+
+
+def count_nodes(statements):
+    # Distinct node objects, shared subtrees are counted once
+    seen = set()
+    stack = list(statements)
+    while stack:
+        node = stack.pop()
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+        if isinstance(node, BinaryOpNode):
+            stack.extend((node.left, node.right))
+        elif isinstance(node, UnaryOpNode):
+            stack.append(node.expr)
+        elif isinstance(node, AssignNode):
+            stack.extend((node.variable, node.value))
+    return len(seen)
@@ -0,0 +1,153 @@
+import mmap
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from main import (AssignNode, BinaryOpNode, Lexer, NumberNode, Parser, Token, TokenBuffer,
+                  TokenType, UnaryOpNode, VariableNode, parse_file, postorder)
+
+# Opcodes of the postfix form used to send ASTs back from the workers
+NUMBER, VARIABLE, BINARY, UNARY, ASSIGN, STATEMENT = range(6)
+UTF8_CONTINUATION = bytes(range(0x80, 0xC0))  # bytes that do not start a character
+
+
+def flatten_ast(statements):
+    # Postfix opcodes plus a list of constants, far cheaper to pickle than the node objects
+    codes = array('B')
+    constants = []
+    for statement in statements:
+        for node in postorder(statement):
+            if isinstance(node, BinaryOpNode):
+                codes.append(BINARY)
+                constants.append((node.op.type, node.op.value))
+            elif isinstance(node, UnaryOpNode):
+                codes.append(UNARY)
+                constants.append((node.op.type, node.op.value))
+            elif isinstance(node, NumberNode):
+                codes.append(NUMBER)
+                constants.append((node.token.type, node.value))
+            elif isinstance(node, VariableNode):
+                codes.append(VARIABLE)
+                constants.append(node.name)
+            elif isinstance(node, AssignNode):
+                codes.append(ASSIGN)
+                constants.append(node.variable.name)
+        codes.append(STATEMENT)
+        constants.append(None)
+    return codes, constants
+
+
+def rebuild_ast(codes, constants):
+    statements = []
+    stack = []
+    tokens = {}  # equal tokens are shared, they are never modified after lexing
+    for code, constant in zip(codes, constants):
+        if code == STATEMENT:
+            statements.append(stack.pop())
+            continue
+        if code == VARIABLE or code == ASSIGN:
+            constant = (TokenType.IDENTIFIER, constant)
+        token = tokens.get(constant)
+        if token is None:
+            token = tokens[constant] = Token(*constant)
+
+        if code == NUMBER:
+            stack.append(NumberNode(token))
+        elif code == VARIABLE:
+            stack.append(VariableNode(token))
+        elif code == BINARY:
+            right = stack.pop()
+            stack.append(BinaryOpNode(stack.pop(), token, right))
+        elif code == UNARY:
+            stack.append(UnaryOpNode(token, stack.pop()))
+        else:
+            stack.append(AssignNode(VariableNode(token), stack.pop()))
+    return statements
+
+
+def split_lines(mapped, pieces):
+    # Byte ranges of about equal size that all end right after a newline
+    ranges = []
+    start = 0
+    step = max(1, len(mapped) // pieces)
+    while start < len(mapped):
+        end = mapped.find(b'\n', min(start + step, len(mapped)) - 1)
+        end = len(mapped) if end == -1 else end + 1
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def normalize_newlines(text):
+    # What reading the file in text mode does, as parse_file does
+    return text.replace('\r\n', '\n').replace('\r', '\n')
+
+
+def parse_chunk(file_path, start, end, first_line, first_position):
+    # Runs in a worker process: lexes and parses one range of the file. Returns (tokens, ast,
+    # lexer error, parse error); errors are sent back rather than raised, since parse_file
+    # lexes the whole file first and so reports a lexer error in any chunk before a parse error.
+    with open(file_path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        text = normalize_newlines(mapped[start:end].decode('utf-8'))
+    lexer = Lexer(text)
+    lexer.line_number = first_line
+    lexer.offset = first_position
+    try:
+        tokens = TokenBuffer.from_lexer(lexer)
+    except Exception as error:
+        return None, None, error, None
+    try:
+        ast = flatten_ast(Parser(tokens).parse())
+    except Exception as error:
+        return tokens, None, None, error
+    return tokens, ast, None, None
+
+
+def parse_file_parallel(file_path, workers=None):
+    # Same result as parse_file, with the file split at line boundaries across a process pool
+    abs_file_path = os.path.abspath(file_path)
+    if not os.path.exists(abs_file_path):
+        raise FileNotFoundError(f"File not found: {abs_file_path}")
+    if os.path.getsize(abs_file_path) == 0:
+        return parse_file(abs_file_path)
+
+    workers = workers or os.cpu_count()
+    with open(abs_file_path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        ranges = split_lines(mapped, workers * 4)
+        # Line number and character position each range starts at in the text parse_file would
+        # read, so error messages point into the whole file. Ranges end after a '\n', so no
+        # '\r\n' pair is split between two of them.
+        first_lines = []
+        first_positions = []
+        line = 1
+        position = 0
+        for start, end in ranges:
+            first_lines.append(line)
+            first_positions.append(position)
+            chunk = mapped[start:end]
+            crlf = chunk.count(b'\r\n')
+            line += chunk.count(b'\n') + chunk.count(b'\r') - crlf
+            position += len(chunk.translate(None, UTF8_CONTINUATION)) - crlf
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(
+            parse_chunk,
+            [abs_file_path] * len(ranges),
+            [start for start, _ in ranges],
+            [end for _, end in ranges],
+            first_lines,
+            first_positions,
+        ))
+
+    for _, _, lexer_error, _ in results:
+        if lexer_error is not None:
+            raise lexer_error
+    for _, _, _, parse_error in results:
+        if parse_error is not None:
+            raise parse_error
+
+    tokens = TokenBuffer.concatenate([chunk_tokens for chunk_tokens, _, _, _ in results])
+    ast = []
+    for _, (codes, constants), _, _ in results:
+        ast.extend(rebuild_ast(codes, constants))
+    return tokens, ast